@@ -2,32 +2,41 @@
 When a ship's route intersects an incident buffer, compute an alternative route
 that avoids the buffer. Writes data/alternative_routes.geojson.
 
-Run from project root: python geospatial_analysis/alternative_routes.py
+Run from project root: python geospatial_analysis/alternative_routes.py [--astar]
+  --astar: reroute with A* (great-circle heuristic) instead of Dijkstra
 Requires: routes.geojson, incident_buffers.geojson, route_calculator (same inputs).
 """
 import json
 import os
+import sys
 
 import networkx as nx
+import numpy as np
+import shapely
 from shapely.geometry import LineString, shape
 
 # Reuse route_calculator graph and path logic
 from route_calculator import (
+    SegmentIndex,
     add_off_network_point,
-    build_lane_graph,
-    connect_disconnected_components,
     expand_path_to_geometry,
+    fleet_bbox,
+    great_circle_heuristic,
+    load_lane_graph,
     snap_to_network,
 )
+from geojson_stream import features_of, iter_features
+from overlay_graph import OverlayGraph
 
 BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE, "data")
+BUFFER_PENALTY = 100.0  # multiply weight of buffer edges so paths prefer going around
 
 
 def load_buffers_as_polygons(incident_buffers_geojson):
-    """Return list of shapely polygons from incident_buffers GeoJSON."""
+    """Return list of shapely polygons from incident_buffers GeoJSON (dict or feature iterable)."""
     polys = []
-    for f in incident_buffers_geojson.get("features") or []:
+    for f in features_of(incident_buffers_geojson):
         geom = f.get("geometry")
         if not geom:
             continue
@@ -68,7 +77,33 @@ def edge_intersects_buffers(edge_geom, buffer_polygons):
     return False
 
 
-def main():
+def edges_intersect_buffers(edge_geom_list, buffer_polygons):
+    """Vectorized edge_intersects_buffers: boolean mask over edge_geom_list.
+    Buffers go into an STRtree (prepared), edge bboxes are matched against it and
+    the candidate pairs are tested with one shapely.intersects call."""
+    n = len(edge_geom_list)
+    mask = np.zeros(n, dtype=bool)
+    if n == 0 or not buffer_polygons:
+        return mask
+    lengths = np.array([len(g) if g else 0 for g in edge_geom_list])
+    usable = np.flatnonzero(lengths >= 2)
+    if len(usable) == 0:
+        return mask
+    coords = np.array([c for i in usable.tolist() for c in edge_geom_list[i]], dtype=np.float64)
+    lines = shapely.linestrings(coords, indices=np.repeat(np.arange(len(usable)), lengths[usable]))
+
+    polys = np.array(buffer_polygons, dtype=object)
+    shapely.prepare(polys)
+    tree = shapely.STRtree(polys)
+    line_idx, poly_idx = tree.query(lines)
+    # A midpoint inside a buffer implies the line intersects it, so intersects alone suffices
+    hit = shapely.intersects(polys[poly_idx], lines[line_idx])
+    mask[usable[np.unique(line_idx[hit])]] = True
+    mask[usable[~shapely.is_valid(lines)]] = False
+    return mask
+
+
+def main(astar=False):
     lanes_path = os.path.join(DATA_DIR, "Shipping_Lanes_v1.geojson")
     ships_path = os.path.join(DATA_DIR, "shipping_data.geojson")
     dest_path = os.path.join(DATA_DIR, "destinations.geojson")
@@ -83,18 +118,8 @@ def main():
         print("Run incident_buffers.py first to generate incident_buffers.geojson")
         return
 
-    with open(lanes_path, "r", encoding="utf-8") as f:
-        lanes = json.load(f)
-    with open(ships_path, "r", encoding="utf-8") as f:
-        ships = json.load(f)
-    with open(dest_path, "r", encoding="utf-8") as f:
-        dests = json.load(f)
-    with open(routes_path, "r", encoding="utf-8") as f:
-        routes = json.load(f)
-    with open(buffers_path, "r", encoding="utf-8") as f:
-        incident_buffers = json.load(f)
-
-    buffer_polygons = load_buffers_as_polygons(incident_buffers)
+    dest_features = list(iter_features(dest_path))
+    buffer_polygons = load_buffers_as_polygons(iter_features(buffers_path))
     if not buffer_polygons:
         print("No incident buffers; nothing to avoid. Written empty alternative_routes.geojson")
         fc = {"type": "FeatureCollection", "features": []}
@@ -102,22 +127,11 @@ def main():
             json.dump(fc, f, indent=2)
         return
 
-    # Bbox and build full graph (same as route_calculator)
-    all_lons = [c[0] for f in ships.get("features") or [] for c in [f.get("geometry", {}).get("coordinates") or []] if len(c) >= 2]
-    all_lats = [c[1] for f in ships.get("features") or [] for c in [f.get("geometry", {}).get("coordinates") or []] if len(c) >= 2]
-    for f in dests.get("features") or []:
-        c = (f.get("geometry") or {}).get("coordinates")
-        if c and len(c) >= 2:
-            all_lons.append(c[0])
-            all_lats.append(c[1])
-    pad = 15.0
-    bbox = (min(all_lons) - pad, min(all_lats) - pad, max(all_lons) + pad, max(all_lats) + pad) if all_lons else None
-
-    G, edge_geoms = build_lane_graph(lanes, bbox=bbox)
-    connect_disconnected_components(G, edge_geoms)
+    # Bbox and full graph (same as route_calculator, shares its compiled cache)
+    bbox = fleet_bbox(iter_features(ships_path), dest_features)
+    G, edge_geoms = load_lane_graph(lanes_path, bbox=bbox)
 
     # Destination on full graph
-    dest_features = dests.get("features") or []
     dest_point = None
     if dest_features:
         g = dest_features[0].get("geometry")
@@ -128,30 +142,30 @@ def main():
         print("No destination point found")
         return
     dest_name = (dest_features[0].get("properties") or {}).get("name") or "Hamburg"
-    dest_node, _ = snap_to_network(G, edge_geoms, dest_point[0], dest_point[1])
+    index = SegmentIndex(edge_geoms)
+    # G stays untouched: destination attachment and penalties go into an overlay layer
+    G_penalty = OverlayGraph(G, edge_geoms)
+    edge_geoms_penalty = G_penalty.edge_geoms
+    dest_node, _ = snap_to_network(G_penalty, edge_geoms_penalty, dest_point[0], dest_point[1], index=index)
     if dest_node is None:
         dest_node_id = "dest"
-        add_off_network_point(G, edge_geoms, dest_point[0], dest_point[1], dest_node_id)
+        add_off_network_point(G_penalty, edge_geoms_penalty, dest_point[0], dest_point[1], dest_node_id, index=index)
     else:
         dest_node_id = dest_node
 
     # Penalty-based: keep graph connected but make buffer-intersecting edges very expensive
     # so shortest path will avoid buffers when possible (alternative route)
-    BUFFER_PENALTY = 100.0  # multiply weight so path prefers going around
-    G_penalty = G.copy()
-    edge_geoms_penalty = dict(edge_geoms)
-    for (u, v) in G_penalty.edges():
-        geom = edge_geoms_penalty.get((u, v)) or edge_geoms_penalty.get((v, u))
-        if geom and edge_intersects_buffers(geom, buffer_polygons):
-            w = G_penalty[u][v].get("weight", 1)
-            G_penalty[u][v]["weight"] = w * BUFFER_PENALTY
-
-    route_features = routes.get("features") or []
-    ship_features = ships.get("features") or []
-    vessel_to_ship = {(f.get("properties") or {}).get("vessel_name"): f for f in ship_features if (f.get("properties") or {}).get("vessel_name")}
+    edges = list(G_penalty.edges())
+    geoms = [edge_geoms_penalty.get((u, v)) or edge_geoms_penalty.get((v, u)) for (u, v) in edges]
+    in_buffer = edges_intersect_buffers(geoms, buffer_polygons)
+    for k in np.flatnonzero(in_buffer).tolist():
+        u, v = edges[k]
+        G_penalty.penalize(u, v, BUFFER_PENALTY)
+
+    vessel_to_ship = {(f.get("properties") or {}).get("vessel_name"): f for f in iter_features(ships_path) if (f.get("properties") or {}).get("vessel_name")}
 
     alt_features = []
-    for route_f in route_features:
+    for route_f in iter_features(routes_path):
         geom = route_f.get("geometry")
         if not geom or geom.get("type") != "LineString" or not geom.get("coordinates"):
             continue
@@ -166,13 +180,15 @@ def main():
         ship_coords = ship_feat["geometry"]["coordinates"]
         lon, lat = float(ship_coords[0]), float(ship_coords[1])
 
-        G_work = G_penalty.copy()
-        edge_geoms_work = dict(edge_geoms_penalty)
+        # Per-vessel layer for the ship attachment; base graph and penalties are shared
+        G_work = G_penalty.child()
+        edge_geoms_work = G_work.edge_geoms
         ship_node_id = "ship_alt_" + vessel.replace(" ", "_")
-        if add_off_network_point(G_work, edge_geoms_work, lon, lat, ship_node_id) is None:
+        if add_off_network_point(G_work, edge_geoms_work, lon, lat, ship_node_id, index=index) is None:
             continue
         try:
-            path = nx.shortest_path(G_work, ship_node_id, dest_node_id, weight="weight")
+            heuristic = great_circle_heuristic(G_work, dest_node_id) if astar else None
+            path = G_work.shortest_path(ship_node_id, dest_node_id, heuristic=heuristic)
         except (nx.NetworkXNoPath, nx.NodeNotFound):
             continue
         route_coords_out = expand_path_to_geometry(G_work, edge_geoms_work, path)
@@ -197,4 +213,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(astar="--astar" in sys.argv[1:])
@@ -3,42 +3,31 @@ Build a self-contained map HTML with data embedded. No fetch = no CORS.
 Run from project root: python geospatial_analysis/build_map_html.py
 Writes map/shipping_map.html. Open that file directly (file://) or via http.
 """
-import json
 import os
 
+from geojson_stream import dumps_feature_collection, iter_features
+
 BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE, "data")
 MAP_DIR = os.path.join(BASE, "map")
 
 
-def load_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+def feature_collection_js(path):
+    """FeatureCollection JSON for embedding, streamed feature by feature (empty if missing)."""
+    return dumps_feature_collection(iter_features(path) if os.path.isfile(path) else [])
 
 
 def main():
-    ships = load_json(os.path.join(DATA_DIR, "shipping_data.geojson"))
-    incidents = load_json(os.path.join(DATA_DIR, "incident_data.geojson"))
-    lanes = load_json(os.path.join(DATA_DIR, "Shipping_Lanes_v1.geojson"))
-    routes_path = os.path.join(DATA_DIR, "routes.geojson")
-    routes = load_json(routes_path) if os.path.isfile(routes_path) else {"type": "FeatureCollection", "features": []}
-    ports_path = os.path.join(DATA_DIR, "hamburg_ports.geojson")
-    ports = load_json(ports_path) if os.path.isfile(ports_path) else {"type": "FeatureCollection", "features": []}
-    buffers_path = os.path.join(DATA_DIR, "incident_buffers.geojson")
-    buffers = load_json(buffers_path) if os.path.isfile(buffers_path) else {"type": "FeatureCollection", "features": []}
-    alt_routes_path = os.path.join(DATA_DIR, "alternative_routes.geojson")
-    alt_routes = load_json(alt_routes_path) if os.path.isfile(alt_routes_path) else {"type": "FeatureCollection", "features": []}
-
     with open(os.path.join(MAP_DIR, "style.css"), "r", encoding="utf-8") as f:
         css = f.read()
 
-    ships_js = json.dumps(ships)
-    incidents_js = json.dumps(incidents)
-    lanes_js = json.dumps(lanes)
-    routes_js = json.dumps(routes)
-    ports_js = json.dumps(ports)
-    buffers_js = json.dumps(buffers)
-    alt_routes_js = json.dumps(alt_routes)
+    ships_js = feature_collection_js(os.path.join(DATA_DIR, "shipping_data.geojson"))
+    incidents_js = feature_collection_js(os.path.join(DATA_DIR, "incident_data.geojson"))
+    lanes_js = feature_collection_js(os.path.join(DATA_DIR, "Shipping_Lanes_v1.geojson"))
+    routes_js = feature_collection_js(os.path.join(DATA_DIR, "routes.geojson"))
+    ports_js = feature_collection_js(os.path.join(DATA_DIR, "hamburg_ports.geojson"))
+    buffers_js = feature_collection_js(os.path.join(DATA_DIR, "incident_buffers.geojson"))
+    alt_routes_js = feature_collection_js(os.path.join(DATA_DIR, "alternative_routes.geojson"))
 
     html = """<!DOCTYPE html>
 <html lang="en">
@@ -141,7 +130,7 @@ def main():
       var g = f.geometry;
       if (!g || !g.coordinates) return;
       var p = f.properties || {};
-      var label = '200 nm buffer – ' + (p.incident_id || p.id || 'Incident');
+      var label = (p.buffer_nm || 200) + ' nm buffer – ' + (p.incident_id || p.id || 'Incident');
       if (g.type === 'Polygon' && g.coordinates && g.coordinates.length) {
         var ring = g.coordinates[0];
         var latlngs = ring.map(toLatLng).filter(Boolean);
@@ -0,0 +1,50 @@
+"""
+Precompile the shipping-lane graph into data/cache/ so route_calculator,
+alternative_routes and the API load it memory-mapped instead of rebuilding it
+from Shipping_Lanes_v1.geojson. The cache is keyed by the lanes file hash + bbox,
+so it is rebuilt automatically when either changes.
+
+Run from project root: python geospatial_analysis/compile_lane_graph.py [--global] [--ch]
+  default:  bbox around ships + destinations (what route_calculator uses)
+  --global: whole lane network, no bbox
+  --ch:     also build the contraction hierarchy for fast point-to-point queries
+"""
+import os
+import sys
+import time
+
+import lane_graph_cache
+from geojson_stream import iter_features
+from route_calculator import (
+    CACHE_DIR,
+    DATA_DIR,
+    MAX_SEGMENT_KM,
+    fleet_bbox,
+    load_contraction_hierarchy,
+    load_lane_graph,
+)
+
+
+def main():
+    lanes_path = os.path.join(DATA_DIR, "Shipping_Lanes_v1.geojson")
+    bbox = None
+    if "--global" not in sys.argv[1:]:
+        bbox = fleet_bbox(iter_features(os.path.join(DATA_DIR, "shipping_data.geojson")),
+                          iter_features(os.path.join(DATA_DIR, "destinations.geojson")))
+
+    key = lane_graph_cache.graph_key(lanes_path, bbox, MAX_SEGMENT_KM)
+    path = lane_graph_cache.cache_path(CACHE_DIR, key)
+    t0 = time.perf_counter()
+    G, _ = load_lane_graph(lanes_path, bbox=bbox)
+    print("Compiled: %s (%d nodes, %d edges) in %.2fs" % (
+        path, G.number_of_nodes(), G.number_of_edges(), time.perf_counter() - t0))
+
+    if "--ch" in sys.argv[1:]:
+        t0 = time.perf_counter()
+        ch = load_contraction_hierarchy(lanes_path, bbox=bbox)
+        print("Contraction hierarchy: %s (%d upward edges) in %.2fs" % (
+            lane_graph_cache.cache_path(CACHE_DIR, key, "ch"), len(ch.up_indices), time.perf_counter() - t0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Contraction hierarchy (CH) over the lane graph for fast point-to-point queries.
+
+Preprocessing contracts nodes one by one (lazy edge-difference order). When a node
+is removed, its neighbours are joined by shortcut edges wherever no witness path
+avoiding it is as short. A query then runs two small upward Dijkstra searches and
+unpacks the shortcuts back into lane-graph node paths. Those paths work with
+route_calculator.expand_path_to_geometry.
+
+The hierarchy is stored next to the compiled lane graph in data/cache/ under the
+same key (see route_calculator.load_contraction_hierarchy).
+"""
+import heapq
+
+import numpy as np
+
+import lane_graph_cache
+
+WITNESS_SETTLE_LIMIT = 60  # settled nodes per witness search; hitting it only adds shortcuts
+
+
+def _witness_search(adj, source, skip, max_dist, limit):
+    """Distances from source avoiding node skip, up to max_dist / limit settled nodes."""
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    settled = 0
+    while heap:
+        d, n = heapq.heappop(heap)
+        if d > dist[n]:
+            continue
+        if d > max_dist or settled >= limit:
+            break
+        settled += 1
+        for m, w in adj[n].items():
+            if m == skip:
+                continue
+            nd = d + w
+            if nd < dist.get(m, float("inf")):
+                dist[m] = nd
+                heapq.heappush(heap, (nd, m))
+    return dist
+
+
+def _shortcuts(adj, v, limit):
+    """Shortcuts (u, x, weight) needed to contract v from the remaining graph adj."""
+    nbrs = list(adj[v].items())
+    out = []
+    for i, (u, wu) in enumerate(nbrs[:-1]):
+        rest = nbrs[i + 1:]
+        dist = _witness_search(adj, u, v, wu + max(w for _, w in rest), limit)
+        for x, wx in rest:
+            if dist.get(x, float("inf")) > wu + wx:
+                out.append((u, x, wu + wx))
+    return out
+
+
+class ContractionHierarchy:
+    """Upward graph of a contracted lane graph.
+
+    nodes: lane-graph node keys, indexed like the arrays. rank[i] is the contraction
+    order of node i. The upward CSR (up_indptr/up_indices/up_weight) lists each
+    node's edges to higher-ranked nodes. up_middle is the contracted node a shortcut
+    bypasses, or -1 for an original edge.
+    """
+
+    def __init__(self, node_coords, rank, up_indptr, up_indices, up_weight, up_middle):
+        self.node_coords = node_coords
+        self.rank = rank
+        self.up_indptr = up_indptr
+        self.up_indices = up_indices
+        self.up_weight = up_weight
+        self.up_middle = up_middle
+        self.nodes = [tuple(c) for c in np.asarray(node_coords).tolist()]
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+        indptr = np.asarray(up_indptr).tolist()
+        indices = np.asarray(up_indices).tolist()
+        weights = np.asarray(up_weight).tolist()
+        middle = np.asarray(up_middle).tolist()
+        self._up = [list(zip(indices[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]]))
+                    for i in range(len(self.nodes))]
+        self._middle = {}
+        for i in range(len(self.nodes)):
+            for k in range(indptr[i], indptr[i + 1]):
+                if middle[k] >= 0:
+                    self._middle[(i, indices[k])] = middle[k]
+
+    @classmethod
+    def build(cls, G, witness_settle_limit=WITNESS_SETTLE_LIMIT):
+        """Contract the lane graph G (tuple node keys, "weight" in km)."""
+        nodes = list(G.nodes())
+        index = {n: i for i, n in enumerate(nodes)}
+        adj = [dict() for _ in nodes]
+        for u, v, w in G.edges(data="weight", default=1.0):
+            i, j = index[u], index[v]
+            if i != j and w < adj[i].get(j, float("inf")):
+                adj[i][j] = adj[j][i] = w
+        middle = {}
+        deleted = [0] * len(nodes)
+        rank = np.full(len(nodes), -1, dtype=np.int64)
+        up = [None] * len(nodes)
+
+        def priority(v):
+            return len(_shortcuts(adj, v, witness_settle_limit)) - len(adj[v]) + deleted[v]
+
+        heap = [(priority(v), v) for v in range(len(nodes))]
+        heapq.heapify(heap)
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            p = priority(v)
+            if heap and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+            for u, x, w in _shortcuts(adj, v, witness_settle_limit):
+                if w < adj[u].get(x, float("inf")):
+                    adj[u][x] = adj[x][u] = w
+                    middle[(min(u, x), max(u, x))] = v
+            up[v] = [(x, w, middle.get((min(v, x), max(v, x)), -1)) for x, w in adj[v].items()]
+            for u in adj[v]:
+                del adj[u][v]
+                deleted[u] += 1
+            adj[v] = {}
+            rank[v] = order
+            order += 1
+
+        counts = [len(e) for e in up]
+        up_indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(counts, out=up_indptr[1:])
+        flat = [e for edges in up for e in edges]
+        return cls(
+            np.array(nodes, dtype=np.float64).reshape(-1, 2),
+            rank,
+            up_indptr,
+            np.array([e[0] for e in flat], dtype=np.int64),
+            np.array([e[1] for e in flat], dtype=np.float64),
+            np.array([e[2] for e in flat], dtype=np.int64),
+        )
+
+    def save(self, path, key):
+        lane_graph_cache.write_arrays(path, {
+            "node_coords": np.asarray(self.node_coords, dtype="<f8"),
+            "rank": np.asarray(self.rank, dtype="<i8"),
+            "up_indptr": np.asarray(self.up_indptr, dtype="<i8"),
+            "up_indices": np.asarray(self.up_indices, dtype="<i8"),
+            "up_weight": np.asarray(self.up_weight, dtype="<f8"),
+            "up_middle": np.asarray(self.up_middle, dtype="<i8"),
+        }, key)
+
+    @classmethod
+    def load(cls, path, key=None):
+        """Memory-mapped hierarchy from path, or None if missing/stale."""
+        arrays = lane_graph_cache.read_arrays(path, key)
+        if arrays is None:
+            return None
+        return cls(arrays["node_coords"], arrays["rank"], arrays["up_indptr"],
+                   arrays["up_indices"], arrays["up_weight"], arrays["up_middle"])
+
+    def _upward(self, init, bound=float("inf"), other=None):
+        """Upward Dijkstra from {node id: initial dist}. With other (the finished
+        opposite search) it tracks the best meeting node and stops past it."""
+        dist = dict(init)
+        pred = {n: None for n in init}
+        heap = [(d, n) for n, d in init.items()]
+        heapq.heapify(heap)
+        best = (bound, None)
+        while heap:
+            d, n = heapq.heappop(heap)
+            if d > dist[n]:
+                continue
+            if d >= best[0]:
+                break
+            if other is not None and n in other and d + other[n] < best[0]:
+                best = (d + other[n], n)
+            for m, w in self._up[n]:
+                nd = d + w
+                if nd < dist.get(m, float("inf")):
+                    dist[m] = nd
+                    pred[m] = n
+                    heapq.heappush(heap, (nd, m))
+        return dist, pred, best
+
+    def _unpack(self, u, x, out):
+        """Append the original-graph node ids from u (exclusive) to x along edge u-x."""
+        stack = [(u, x)]
+        while stack:
+            a, b = stack.pop()
+            m = self._middle.get((a, b), self._middle.get((b, a)))
+            if m is None:
+                out.append(b)
+            else:
+                stack.append((m, b))
+                stack.append((a, m))
+
+    def _query_ids(self, sources, targets):
+        """sources/targets: {node id: initial offset km}. Returns (dist, id path)."""
+        dist_b, pred_b, _ = self._upward(targets)
+        dist_f, pred_f, (best, meet) = self._upward(sources, other=dist_b)
+        if meet is None:
+            return float("inf"), None
+        up_f = [meet]
+        while pred_f[up_f[-1]] is not None:
+            up_f.append(pred_f[up_f[-1]])
+        up_f.reverse()
+        up_b = [meet]
+        while pred_b[up_b[-1]] is not None:
+            up_b.append(pred_b[up_b[-1]])
+        path = [up_f[0]]
+        for a, b in zip(up_f, up_f[1:]):
+            self._unpack(a, b, path)
+        for a, b in zip(up_b, up_b[1:]):
+            self._unpack(a, b, path)
+        return best, path
+
+    def distance(self, source, target):
+        """Shortest-path distance in km between two lane-graph nodes, without unpacking
+        the path (the query itself only touches the small upward search spaces)."""
+        if source == target:
+            return 0.0
+        dist_b, _, _ = self._upward({self.index[target]: 0.0})
+        return self._upward({self.index[source]: 0.0}, other=dist_b)[2][0]
+
+    def query(self, source, target):
+        """Shortest path between two lane-graph nodes: (distance km, node path).
+        Raises KeyError for nodes not in the hierarchy; (inf, None) if unreachable."""
+        if source == target:
+            return 0.0, [source]
+        dist, path = self._query_ids({self.index[source]: 0.0}, {self.index[target]: 0.0})
+        return dist, [self.nodes[i] for i in path] if path else None
+
+    def query_attached(self, sources, targets):
+        """Like query, but each side is {lane node: offset km} (e.g. both ends of the
+        segment an off-network point snaps to, offset = distance to reach that end)."""
+        dist, path = self._query_ids({self.index[n]: d for n, d in sources.items()},
+                                     {self.index[n]: d for n, d in targets.items()})
+        return dist, [self.nodes[i] for i in path] if path else None
@@ -7,6 +7,8 @@ Uses embedded port coordinates for known ports; unknown ports get placeholder [0
 import json
 import os
 
+from geojson_stream import iter_features
+
 BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE, "data")
 
@@ -28,11 +30,6 @@ PORT_COORDS = {
 }
 
 
-def load_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
 def save_geojson(path, fc):
     with open(path, "w", encoding="utf-8") as f:
         json.dump(fc, f, indent=2)
@@ -40,11 +37,9 @@ def save_geojson(path, fc):
 
 def main():
     ships_path = os.path.join(DATA_DIR, "shipping_data.geojson")
-    ships_data = load_json(ships_path)
-
     origin_names = set()
     destination_names = set()
-    for f in ships_data.get("features", []):
+    for f in iter_features(ships_path):
         p = f.get("properties") or {}
         if p.get("origin"):
             origin_names.add(p["origin"])
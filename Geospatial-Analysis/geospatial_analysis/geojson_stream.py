@@ -0,0 +1,134 @@
+"""
+Streaming reader for GeoJSON FeatureCollections.
+
+iter_features yields one feature at a time while the file is read in chunks, so
+peak memory is one feature plus the read buffer instead of the whole nested
+dict/list tree. An optional bbox drops features with no vertex inside it as
+they are parsed. Only the stdlib json decoder is used: the scanner finds the
+top-level "features" array, then raw_decode parses each element in turn.
+"""
+import json
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+def _positions(coords):
+    """Yield every [lon, lat, ...] position of a nested GeoJSON coordinates array."""
+    if not coords:
+        return
+    if isinstance(coords[0], (int, float)):
+        yield coords
+        return
+    for c in coords:
+        yield from _positions(c)
+
+
+def _geometry_positions(geom):
+    if not geom:
+        return
+    if geom.get("type") == "GeometryCollection":
+        for g in geom.get("geometries") or []:
+            yield from _geometry_positions(g)
+    else:
+        yield from _positions(geom.get("coordinates"))
+
+
+def feature_in_bbox(feature, bbox):
+    """True if any vertex of the feature lies in bbox (min_lon, min_lat, max_lon, max_lat)."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return any(min_lon <= c[0] <= max_lon and min_lat <= c[1] <= max_lat
+               for c in _geometry_positions(feature.get("geometry")) if len(c) >= 2)
+
+
+def features_of(geojson):
+    """Features of a FeatureCollection dict, or the iterable itself (e.g. iter_features)."""
+    if isinstance(geojson, dict):
+        return geojson.get("features") or []
+    return geojson
+
+
+def _find_features_array(f, buf, chunk_size):
+    """Scan the top-level object up to the '[' of its "features" member.
+    Returns (buf, index just after '['), or (buf, None) if there is none."""
+    depth = 0
+    in_str = escape = False
+    str_start = 0
+    key = None
+    after_colon = False
+    i = 0
+    while True:
+        if i >= len(buf):
+            more = f.read(chunk_size)
+            if not more:
+                return buf, None
+            buf += more
+        c = buf[i]
+        if in_str:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_str = False
+                if depth == 1 and not after_colon:
+                    key = json.loads(buf[str_start:i + 1])
+        elif c == '"':
+            in_str = True
+            str_start = i
+        elif c in "{[":
+            if depth == 1 and c == "[" and after_colon and key == "features":
+                return buf, i + 1
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+            if depth == 0:
+                return buf, None
+        elif depth == 1 and c == ":":
+            after_colon = True
+        elif depth == 1 and c == ",":
+            after_colon = False
+            key = None
+        i += 1
+
+
+def iter_features(path, bbox=None, chunk_size=CHUNK_SIZE):
+    """Yield the features of the GeoJSON FeatureCollection at path one by one.
+    With bbox, features without any vertex inside it are skipped during the parse."""
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos = _find_features_array(f, f.read(chunk_size), chunk_size)
+        if pos is None:
+            return
+        read_size = chunk_size
+        while True:
+            while pos < len(buf) and (buf[pos] in _WHITESPACE or buf[pos] == ","):
+                pos += 1
+            if pos >= len(buf):
+                more = f.read(read_size)
+                if not more:
+                    raise ValueError("Truncated GeoJSON: features array not closed in %s" % path)
+                buf, pos = buf[pos:] + more, 0
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                feature, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Feature not complete in the buffer yet; read more (growing for big features)
+                more = f.read(read_size)
+                if not more:
+                    raise
+                buf, pos = buf[pos:] + more, 0
+                read_size *= 2
+                continue
+            pos = end
+            read_size = chunk_size
+            if bbox is None or feature_in_bbox(feature, bbox):
+                yield feature
+
+
+def dumps_feature_collection(features):
+    """JSON text of a FeatureCollection built from streamed features."""
+    return '{"type": "FeatureCollection", "features": [' + ", ".join(json.dumps(f) for f in features) + "]}"
@@ -1,64 +1,142 @@
 """
 Create 200 nautical mile (nm) buffers around every incident point.
 Writes data/incident_buffers.geojson (polygons in WGS84).
+An incident's own "buffer_nm" property overrides the 200 nm default.
 
-Run from project root: python geospatial_analysis/incident_buffers.py
+Run from project root: python geospatial_analysis/incident_buffers.py [--geodesic]
+  default:    buffer in the UTM zone of each incident
+  --geodesic: geodesic circles computed directly on the sphere (no projection,
+              no distortion for large radii, high latitudes or zone boundaries)
 """
+import functools
 import json
 import os
+import sys
 
-from shapely.geometry import Point, shape, mapping
-from shapely.ops import transform
+import numpy as np
 import pyproj
+import shapely
+from shapely.geometry import mapping
 
 BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE, "data")
 NM_TO_M = 1852.0
 BUFFER_NM = 200.0
 BUFFER_M = BUFFER_NM * NM_TO_M  # 370400 m
+EARTH_R_M = 6371008.8  # mean Earth radius
+GEODESIC_VERTICES = 64
 
 
-def get_utm_proj(lon, lat):
-    """Return a pyproj transformer (lon,lat -> x,y) for the UTM zone containing (lon, lat)."""
-    zone = int((lon + 180) / 6) + 1
-    south = lat < 0
+def utm_zone(lon, lat):
+    """(zone, south) of the UTM zone containing (lon, lat)."""
+    return int((lon + 180) / 6) + 1, lat < 0
+
+
+@functools.lru_cache(maxsize=None)
+def _utm_transformer(zone, south):
     utm = pyproj.CRS(proj="utm", zone=zone, ellps="WGS84", south=south)
     wgs84 = pyproj.CRS("EPSG:4326")
     return pyproj.Transformer.from_crs(wgs84, utm, always_xy=True)
 
 
+def get_utm_proj(lon, lat):
+    """Return a pyproj transformer (lon,lat -> x,y) for the UTM zone containing (lon, lat).
+    Transformers are cached per zone/hemisphere."""
+    return _utm_transformer(*utm_zone(lon, lat))
+
+
+def buffer_points_wgs84(lons, lats, radius_m):
+    """Buffer many WGS84 points by radius_m meters (scalar or per point); return a
+    list of WGS84 polygons. Points are grouped by UTM zone and each zone is projected,
+    buffered and projected back with one array transform in each direction."""
+    lons = np.asarray(lons, dtype=np.float64)
+    lats = np.asarray(lats, dtype=np.float64)
+    radius_m = np.broadcast_to(np.asarray(radius_m, dtype=np.float64), lons.shape)
+    out = np.empty(len(lons), dtype=object)
+    zones = {}
+    for i, (lon, lat) in enumerate(zip(lons.tolist(), lats.tolist())):
+        zones.setdefault(utm_zone(lon, lat), []).append(i)
+    for zone, idx in zones.items():
+        idx = np.array(idx)
+        proj = _utm_transformer(*zone)
+        x, y = proj.transform(lons[idx], lats[idx])
+        buffered = shapely.buffer(shapely.points(x, y), radius_m[idx], quad_segs=16)
+        xy = shapely.get_coordinates(buffered)
+        lon_out, lat_out = proj.transform(xy[:, 0], xy[:, 1], direction=pyproj.enums.TransformDirection.INVERSE)
+        out[idx] = shapely.set_coordinates(buffered, np.column_stack([lon_out, lat_out]))
+    return list(out)
+
+
 def buffer_point_wgs84(lon, lat, radius_m):
     """Buffer a WGS84 point by radius_m meters; return polygon in WGS84."""
-    point = Point(lon, lat)
-    proj = get_utm_proj(lon, lat)
-    to_utm = lambda x, y: proj.transform(x, y)
-    from_utm = lambda x, y: proj.transform(x, y, direction=pyproj.enums.TransformDirection.INVERSE)
-    point_utm = transform(to_utm, point)
-    buffered = point_utm.buffer(radius_m)
-    polygon_wgs84 = transform(from_utm, buffered)
-    return polygon_wgs84
+    return buffer_points_wgs84([lon], [lat], radius_m)[0]
+
 
+def geodesic_buffers_wgs84(lons, lats, radius_m, n_vertices=GEODESIC_VERTICES):
+    """Geodesic circles of radius_m meters (scalar or per point) around WGS84 points,
+    as a list of polygons with n_vertices vertices each. All circles come from one
+    broadcasted spherical forward-azimuth computation (incidents x vertices).
+    Rings are not wrapped at the antimeridian, so longitudes stay continuous."""
+    lon1 = np.radians(np.asarray(lons, dtype=np.float64))[:, None]
+    lat1 = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+    delta = (np.broadcast_to(np.asarray(radius_m, dtype=np.float64), lon1.shape[:1]) / EARTH_R_M)[:, None]
+    azimuth = np.linspace(0.0, 2 * np.pi, n_vertices, endpoint=False)[None, :]
 
-def main():
+    sin_lat2 = np.sin(lat1) * np.cos(delta) + np.cos(lat1) * np.sin(delta) * np.cos(azimuth)
+    lat2 = np.arcsin(np.clip(sin_lat2, -1.0, 1.0))
+    lon2 = lon1 + np.arctan2(np.sin(azimuth) * np.sin(delta) * np.cos(lat1),
+                             np.cos(delta) - np.sin(lat1) * sin_lat2)
+
+    rings = np.stack([np.degrees(lon2), np.degrees(lat2)], axis=-1)
+    rings = np.concatenate([rings, rings[:, :1]], axis=1)  # close rings
+    return list(shapely.polygons(rings))
+
+
+def incident_buffer_nm(props):
+    """Buffer radius (nm) for an incident: its "buffer_nm" property, BUFFER_NM when it
+    is absent. 0 means no buffer. A value that is not a non-negative number is
+    reported and replaced by BUFFER_NM, so one bad feature does not stop the run."""
+    value = props.get("buffer_nm")
+    if value is None:
+        return BUFFER_NM
+    try:
+        radius = float(value)
+    except (TypeError, ValueError):
+        radius = float("nan")
+    if not np.isfinite(radius) or radius < 0 or isinstance(value, bool):
+        print("Warning: incident %s has invalid buffer_nm %r, using %g nm" % (props.get("id"), value, BUFFER_NM))
+        return BUFFER_NM
+    return radius
+
+
+def main(geodesic=False, n_vertices=GEODESIC_VERTICES):
     incidents_path = os.path.join(DATA_DIR, "incident_data.geojson")
     out_path = os.path.join(DATA_DIR, "incident_buffers.geojson")
 
     with open(incidents_path, "r", encoding="utf-8") as f:
         incidents = json.load(f)
 
-    features = []
+    points = []
     for feat in incidents.get("features") or []:
         geom = feat.get("geometry")
         if not geom or geom.get("type") != "Point" or not geom.get("coordinates"):
             continue
         coords = geom["coordinates"]
-        lon, lat = float(coords[0]), float(coords[1])
+        points.append((feat, float(coords[0]), float(coords[1])))
+
+    lons = [p[1] for p in points]
+    lats = [p[2] for p in points]
+    radius_nm = np.array([incident_buffer_nm(p[0].get("properties") or {}) for p in points], dtype=np.float64)
+    if geodesic:
+        polys = geodesic_buffers_wgs84(lons, lats, radius_nm * NM_TO_M, n_vertices)
+    else:
+        polys = buffer_points_wgs84(lons, lats, radius_nm * NM_TO_M)
+    features = []
+    for (feat, lon, lat), poly, buffer_nm in zip(points, polys, radius_nm.tolist()):
         props = dict(feat.get("properties") or {})
-        props["buffer_nm"] = BUFFER_NM
+        props["buffer_nm"] = buffer_nm
         props["incident_id"] = props.get("id")
-
-        poly = buffer_point_wgs84(lon, lat, BUFFER_M)
-        if poly.is_empty:
+        if poly.is_empty or buffer_nm == 0:
             continue
         features.append({
             "type": "Feature",
@@ -73,4 +151,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(geodesic="--geodesic" in sys.argv[1:])
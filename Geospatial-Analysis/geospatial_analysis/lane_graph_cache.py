@@ -0,0 +1,436 @@
+"""
+Compact binary storage for the densified shipping-lane graph.
+
+The lane graph is stored as flat NumPy arrays: one node coordinate array (integer node
+ids), an edge table with one row per undirected edge, CSR adjacency and edge geometry
+offsets into a single coordinate array. route_calculator.build_lane_arrays builds them
+directly and they are written once into data/cache/. Files are keyed by a hash of the lanes file
+and the bbox, and are read back with np.memmap so loading costs no parsing.
+
+File layout: MAGIC | uint64 header length | JSON header | arrays (64-byte aligned).
+"""
+import hashlib
+import json
+import os
+import struct
+from collections.abc import MutableMapping
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+
+MAGIC = b"LANEGRF1"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+# Array name -> dtype. Edge e runs edge_u[e] -> edge_v[e]; its geometry is
+# geom_coords[geom_offsets[e]:geom_offsets[e + 1]] in that direction. CSR rows list
+# each node's neighbours in insertion order (adj_edge maps a CSR slot to its edge).
+ARRAY_DTYPES = {
+    "node_coords": "<f8",
+    "edge_u": "<i8",
+    "edge_v": "<i8",
+    "edge_weight": "<f8",
+    "geom_offsets": "<i8",
+    "geom_coords": "<f8",
+    "indptr": "<i8",
+    "indices": "<i8",
+    "adj_weight": "<f8",
+    "adj_edge": "<i8",
+}
+
+
+def graph_key(lanes_path, bbox=None, max_segment_km=None):
+    """Content hash of the lanes file plus everything else that shapes the graph."""
+    h = hashlib.sha256()
+    with open(lanes_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    params = {
+        "version": FORMAT_VERSION,
+        "bbox": [round(float(x), 6) for x in bbox] if bbox else None,
+        "max_segment_km": max_segment_km,
+    }
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:24]
+
+
+def cache_path(cache_dir, key, suffix="lanegraph"):
+    return os.path.join(cache_dir, "lanes_%s.%s" % (key, suffix))
+
+
+class LaneGraphArrays:
+    """Array view of a lane graph (memory-mapped when read from disk)."""
+
+    def __init__(self, arrays, key=None):
+        self.key = key
+        for name in ARRAY_DTYPES:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def from_edges(cls, node_coords, edge_u, edge_v, edge_weight, geom_offsets, geom_coords):
+        """Arrays from an edge table (one row per undirected edge); builds the CSR."""
+        node_coords = np.asarray(node_coords, dtype=np.float64).reshape(-1, 2)
+        edge_u = np.asarray(edge_u, dtype=np.int64)
+        edge_v = np.asarray(edge_v, dtype=np.int64)
+        edge_weight = np.asarray(edge_weight, dtype=np.float64)
+        indptr, indices, adj_weight, adj_edge = _build_csr(len(node_coords), edge_u, edge_v, edge_weight)
+        return cls({
+            "node_coords": node_coords,
+            "edge_u": edge_u,
+            "edge_v": edge_v,
+            "edge_weight": edge_weight,
+            "geom_offsets": np.asarray(geom_offsets, dtype=np.int64),
+            "geom_coords": np.asarray(geom_coords, dtype=np.float64).reshape(-1, 2),
+            "indptr": indptr,
+            "indices": indices,
+            "adj_weight": adj_weight,
+            "adj_edge": adj_edge,
+        })
+
+    @property
+    def n_nodes(self):
+        return len(self.node_coords)
+
+    @property
+    def n_edges(self):
+        return len(self.edge_u)
+
+    def edge_geometry(self, e):
+        """Coordinates of edge e as [[lon, lat], ...] in edge_u -> edge_v direction."""
+        return self.geom_coords[self.geom_offsets[e]:self.geom_offsets[e + 1]].tolist()
+
+    def neighbors(self, i):
+        """(neighbour ids, weights) of node i from the CSR adjacency."""
+        a, b = self.indptr[i], self.indptr[i + 1]
+        return self.indices[a:b], self.adj_weight[a:b]
+
+
+def _build_csr(n_nodes, edge_u, edge_v, edge_weight):
+    n_edges = len(edge_u)
+    src = np.concatenate([edge_u, edge_v])
+    dst = np.concatenate([edge_v, edge_u])
+    eid = np.concatenate([np.arange(n_edges), np.arange(n_edges)])
+    # Interleave forward/reverse entries so each row keeps edge insertion order
+    slot = np.concatenate([2 * np.arange(n_edges), 2 * np.arange(n_edges) + 1])
+    order = np.lexsort((slot, src))
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_nodes), out=indptr[1:])
+    return indptr, dst[order], np.concatenate([edge_weight, edge_weight])[order], eid[order]
+
+
+class EdgeGeometries(MutableMapping):
+    """edge_geoms-compatible mapping backed by LaneGraphArrays.
+
+    Each undirected edge's geometry is stored once in geom_coords. A lookup of
+    (v, u) returns it reversed. Lookups go through the CSR rows, so there is no
+    per-edge dict. Entries set later (bridge/snap/ship attachments) go into a small
+    overflow dict. Iteration order is that of a plain edge_geoms dict:
+    (u, v) then (v, u) per edge, in edge order.
+    """
+
+    def __init__(self, arrays, nodes=None, index=None):
+        self.arrays = arrays
+        self.nodes = nodes if nodes is not None else [tuple(c) for c in np.asarray(arrays.node_coords).tolist()]
+        self.index = index if index is not None else {n: i for i, n in enumerate(self.nodes)}
+        self.extra = {}
+
+    def _base_geometry(self, key):
+        try:
+            u, v = key
+        except (TypeError, ValueError):
+            return None
+        i = self.index.get(u) if not isinstance(u, str) else None
+        j = self.index.get(v) if not isinstance(v, str) else None
+        if i is None or j is None:
+            return None
+        a = self.arrays
+        start, end = int(a.indptr[i]), int(a.indptr[i + 1])
+        row = a.indices[start:end].tolist()
+        if j not in row:
+            return None
+        e = int(a.adj_edge[start + row.index(j)])
+        geom = a.geom_coords[a.geom_offsets[e]:a.geom_offsets[e + 1]].tolist()
+        return geom if int(a.edge_u[e]) == i else geom[::-1]
+
+    def __getitem__(self, key):
+        if key in self.extra:
+            return self.extra[key]
+        geom = self._base_geometry(key)
+        if geom is None:
+            raise KeyError(key)
+        return geom
+
+    def __contains__(self, key):
+        return key in self.extra or self._base_geometry(key) is not None
+
+    def get(self, key, default=None):
+        if key in self.extra:
+            return self.extra[key]
+        geom = self._base_geometry(key)
+        return default if geom is None else geom
+
+    def __setitem__(self, key, geom):
+        self.extra[key] = geom
+
+    def __delitem__(self, key):
+        del self.extra[key]  # base geometries are read-only
+
+    def items(self):
+        a = self.arrays
+        offsets = np.asarray(a.geom_offsets).tolist()
+        coords = np.asarray(a.geom_coords).tolist()
+        for e, (i, j) in enumerate(zip(np.asarray(a.edge_u).tolist(), np.asarray(a.edge_v).tolist())):
+            u, v = self.nodes[i], self.nodes[j]
+            geom = coords[offsets[e]:offsets[e + 1]]
+            yield (u, v), self.extra.get((u, v), geom)
+            yield (v, u), self.extra.get((v, u), geom[::-1])
+        for key, geom in self.extra.items():
+            if self._base_geometry(key) is None:
+                yield key, geom
+
+    def __iter__(self):
+        return (key for key, _ in self.items())
+
+    def __len__(self):
+        return 2 * self.arrays.n_edges + sum(1 for k in self.extra if self._base_geometry(k) is None)
+
+
+class _NodeView:
+    """G.nodes for LaneGraph: iteration, membership and G.nodes[n] attribute dicts."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __call__(self):
+        return self
+
+    def __iter__(self):
+        yield from self.graph.node_keys
+        yield from self.graph.extra_ids
+
+    def __len__(self):
+        return len(self.graph.node_keys) + len(self.graph.extra_ids)
+
+    def __contains__(self, n):
+        return self.graph.has_node(n)
+
+    def __getitem__(self, n):
+        if not self.graph.has_node(n):
+            raise KeyError(n)
+        return self.graph.attrs.get(n, {})
+
+
+class LaneGraph:
+    """Lane graph read straight from LaneGraphArrays, with the part of the networkx
+    Graph API the routing code uses (has_node, add_node, add_edge, nodes, adj / G[n],
+    has_edge, edges).
+
+    Adjacency comes from the CSR rows, in the same order a networkx graph built from
+    the edge table would give. Nodes and edges added later (snap points, ship and
+    destination attachments) go into small overflow dicts; base lane edges are
+    read-only. Node ids: lane nodes are their array index, added nodes follow in
+    insertion order (see to_csgraph). to_networkx() builds an nx.Graph on demand for
+    callers that need networkx algorithms and keeps it in sync with later additions.
+    """
+
+    def __init__(self, arrays, nodes=None, index=None):
+        self.arrays = arrays
+        self.node_keys = nodes if nodes is not None else [tuple(c) for c in np.asarray(arrays.node_coords).tolist()]
+        self.index = index if index is not None else {n: i for i, n in enumerate(self.node_keys)}
+        self.extra_ids = {}  # added node -> id
+        self.extra_keys = []  # added nodes in id order
+        self.extra_adj = {}  # node -> {neighbour: weight}, both directions, added edges only
+        self.attrs = {}  # node -> attribute dict
+        self._nx = None
+
+    def node_id(self, n):
+        """Integer id of node n (None if n is not in the graph)."""
+        i = self.index.get(n) if not isinstance(n, str) else None
+        return i if i is not None else self.extra_ids.get(n)
+
+    def node_key(self, i):
+        return self.node_keys[i] if i < len(self.node_keys) else self.extra_keys[i - len(self.node_keys)]
+
+    def has_node(self, n):
+        return self.node_id(n) is not None
+
+    __contains__ = has_node
+
+    def add_node(self, n, **attrs):
+        if not self.has_node(n):
+            self.extra_ids[n] = len(self.node_keys) + len(self.extra_keys)
+            self.extra_keys.append(n)
+        if attrs:
+            self.attrs.setdefault(n, {}).update(attrs)
+        if self._nx is not None:
+            self._nx.add_node(n, **attrs)
+
+    def add_edge(self, u, v, weight=1.0):
+        if self._has_base_edge(u, v):
+            raise ValueError("Lane edge %s-%s is read-only" % (u, v))
+        self.add_node(u)
+        self.add_node(v)
+        self.extra_adj.setdefault(u, {})[v] = weight
+        self.extra_adj.setdefault(v, {})[u] = weight
+        if self._nx is not None:
+            self._nx.add_edge(u, v, weight=weight)
+
+    @property
+    def nodes(self):
+        return _NodeView(self)
+
+    @property
+    def adj(self):
+        return self
+
+    def __getitem__(self, n):
+        """{neighbour: {"weight": w}} of node n, like G[n] in networkx."""
+        i = self.node_id(n)
+        if i is None:
+            raise KeyError(n)
+        nbrs = {}
+        if i < len(self.node_keys):
+            a, b = int(self.arrays.indptr[i]), int(self.arrays.indptr[i + 1])
+            for j, w in zip(self.arrays.indices[a:b].tolist(), self.arrays.adj_weight[a:b].tolist()):
+                nbrs[self.node_keys[j]] = {"weight": w}
+        for v, w in self.extra_adj.get(n, {}).items():
+            nbrs[v] = {"weight": w}
+        return nbrs
+
+    def _has_base_edge(self, u, v):
+        i, j = self.index.get(u), self.index.get(v)
+        if i is None or j is None or isinstance(u, str) or isinstance(v, str):
+            return False
+        a, b = int(self.arrays.indptr[i]), int(self.arrays.indptr[i + 1])
+        return bool((self.arrays.indices[a:b] == j).any())
+
+    def has_edge(self, u, v):
+        return v in self.extra_adj.get(u, ()) or self._has_base_edge(u, v)
+
+    def edges(self, data=None, default=None):
+        """(u, v) per undirected edge, lane edges first; (u, v, weight) with data="weight"."""
+        keys = self.node_keys
+        a = self.arrays
+        for i, j, w in zip(np.asarray(a.edge_u).tolist(), np.asarray(a.edge_v).tolist(),
+                           np.asarray(a.edge_weight).tolist()):
+            yield (keys[i], keys[j], w) if data else (keys[i], keys[j])
+        seen = set()
+        for u, nbrs in self.extra_adj.items():
+            for v, w in nbrs.items():
+                if (v, u) not in seen:
+                    seen.add((u, v))
+                    yield (u, v, w) if data else (u, v)
+
+    def number_of_nodes(self):
+        return len(self.node_keys) + len(self.extra_ids)
+
+    def number_of_edges(self):
+        return self.arrays.n_edges + sum(len(nbrs) for nbrs in self.extra_adj.values()) // 2
+
+    def to_csgraph(self):
+        """Sparse weight matrix over all node ids (lane CSR plus added edges) for
+        scipy.sparse.csgraph. Explicit zeros are edges there, like zero-km links here."""
+        n_base, n = len(self.node_keys), self.number_of_nodes()
+        a = self.arrays
+        indptr = np.concatenate([np.asarray(a.indptr), np.full(n - n_base, a.indptr[-1], dtype=np.int64)])
+        matrix = csr_matrix((np.asarray(a.adj_weight), np.asarray(a.indices), indptr), shape=(n, n))
+        if not self.extra_adj:
+            return matrix
+        rows, cols, weights = [], [], []
+        for u, nbrs in self.extra_adj.items():
+            for v, w in nbrs.items():
+                rows.append(self.node_id(u))
+                cols.append(self.node_id(v))
+                weights.append(w)
+        return (matrix + csr_matrix((weights, (rows, cols)), shape=(n, n))).tocsr()
+
+    def to_networkx(self):
+        """nx.Graph with the same nodes, edges and weights (built once, then kept in sync)."""
+        if self._nx is None:
+            G = nx.Graph()
+            G.add_nodes_from((n, self.attrs.get(n, {})) for n in self.nodes)
+            G.add_weighted_edges_from(self.edges(data="weight"))
+            self._nx = G
+        return self._nx
+
+
+def arrays_to_graph(arrays):
+    """(G, edge_geoms) for the router from LaneGraphArrays: a LaneGraph and an
+    EdgeGeometries view sharing one node list and index. Nothing is copied per edge."""
+    nodes = [tuple(c) for c in np.asarray(arrays.node_coords).tolist()]
+    index = {n: i for i, n in enumerate(nodes)}
+    return LaneGraph(arrays, nodes, index), EdgeGeometries(arrays, nodes, index)
+
+
+def write_arrays(path, arrays, key):
+    """Write a dict of NumPy arrays to path in the format above (atomically, via a
+    temp file). Also used for artifacts derived from the graph (contraction hierarchy)."""
+    header = {"version": FORMAT_VERSION, "key": key, "arrays": {}}
+    blobs = []
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        offset = -(-offset // ALIGN) * ALIGN
+        header["arrays"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        blobs.append((offset, arr))
+        offset += arr.nbytes
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGN) * ALIGN
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for rel, arr in blobs:
+            f.seek(data_start + rel)
+            f.write(arr.tobytes())
+    os.replace(tmp, path)
+
+
+def read_arrays(path, key=None):
+    """Memory-map the arrays of a file written by write_arrays. Returns None if the
+    file is missing, malformed (e.g. truncated) or does not match key."""
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        if header.get("version") != FORMAT_VERSION or (key and header.get("key") != key):
+            return None
+        data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGN) * ALIGN
+        specs = {name: (np.dtype(spec["dtype"]), tuple(spec["shape"]), int(spec["offset"]))
+                 for name, spec in header["arrays"].items()}
+        # Every array must lie inside the file
+        end = max((data_start + offset + dtype.itemsize * int(np.prod(shape))
+                   for dtype, shape, offset in specs.values()), default=data_start)
+        if os.path.getsize(path) < end:
+            return None
+        arrays = {}
+        for name, (dtype, shape, offset) in specs.items():
+            if 0 in shape:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start + offset, shape=shape)
+    except (struct.error, ValueError, UnicodeDecodeError, KeyError, TypeError, AttributeError):
+        return None
+    return arrays
+
+
+def write_lane_graph(path, arrays, key):
+    """Write LaneGraphArrays to path."""
+    write_arrays(path, {name: np.asarray(getattr(arrays, name), dtype=dtype)
+                        for name, dtype in ARRAY_DTYPES.items()}, key)
+
+
+def read_lane_graph(path, key=None):
+    """Memory-map a graph file written by write_lane_graph (None if missing/stale)."""
+    arrays = read_arrays(path, key)
+    if arrays is None or any(name not in arrays for name in ARRAY_DTYPES):
+        return None
+    return LaneGraphArrays(arrays, key=key)
@@ -0,0 +1,139 @@
+"""
+Lightweight delta layer over the lane graph for incident rerouting.
+
+OverlayGraph wraps an immutable base graph (G, edge_geoms) and keeps only the
+changes: extra nodes/edges (ship and destination attachments) and per-edge weight
+multipliers (incident buffer penalties). Layers stack, e.g. base -> penalties ->
+one vessel's attachment, so rerouting a vessel costs a child layer plus a Dijkstra
+search instead of copying the whole graph.
+
+It implements the part of the networkx API used by route_calculator's snapping
+helpers (has_node, add_node, add_edge, nodes), so add_off_network_point and
+snap_to_network work on an overlay with overlay.edge_geoms unchanged.
+"""
+import heapq
+from collections import ChainMap
+
+import networkx as nx
+
+
+class OverlayGraph:
+    def __init__(self, G, edge_geoms, parent=None):
+        self.base = G
+        self.parent = parent
+        self.extra_adj = {}  # node -> {neighbour: weight}, both directions
+        self.extra_nodes = {}  # node -> attrs
+        self.penalties = {}  # (u, v) -> weight multiplier, both directions
+        self.chain = [self] + (parent.chain if parent is not None else [])  # this layer first
+        parent_geoms = parent.edge_geoms if parent is not None else edge_geoms
+        self.edge_geoms = parent_geoms.new_child() if isinstance(parent_geoms, ChainMap) else ChainMap({}, parent_geoms)
+
+    def child(self):
+        """New empty layer on top of this one (this layer stays unchanged)."""
+        return OverlayGraph(self.base, None, parent=self)
+
+    # networkx-like API used by snap_to_network / add_off_network_point
+
+    def has_node(self, n):
+        return n in self.base or any(n in layer.extra_nodes for layer in self.chain)
+
+    __contains__ = has_node
+
+    def add_node(self, n, **attrs):
+        if not self.has_node(n):
+            self.extra_nodes[n] = dict(attrs)
+        elif attrs:
+            self.extra_nodes.setdefault(n, {}).update(attrs)
+
+    def add_edge(self, u, v, weight=1.0):
+        self.add_node(u)
+        self.add_node(v)
+        self.extra_adj.setdefault(u, {})[v] = weight
+        self.extra_adj.setdefault(v, {})[u] = weight
+
+    @property
+    def nodes(self):
+        return ChainMap(*[layer.extra_nodes for layer in self.chain], self.base.nodes)
+
+    def has_edge(self, u, v):
+        if self.base.has_edge(u, v):
+            return True
+        return any(v in layer.extra_adj.get(u, ()) for layer in self.chain)
+
+    def edges(self):
+        """All (u, v) edges, base first, each undirected edge once."""
+        yield from self.base.edges()
+        seen = set()
+        for layer in reversed(self.chain):
+            for u, nbrs in layer.extra_adj.items():
+                for v in nbrs:
+                    if (v, u) not in seen and not self.base.has_edge(u, v):
+                        seen.add((u, v))
+                        yield u, v
+
+    # weights
+
+    def penalize(self, u, v, factor):
+        """Multiply the weight of edge u-v by factor in this layer."""
+        self.penalties[(u, v)] = self.penalties[(v, u)] = self._penalty(u, v) * factor
+
+    def _penalty(self, u, v):
+        for layer in self.chain:
+            if (u, v) in layer.penalties:
+                return layer.penalties[(u, v)]
+        return 1.0
+
+    def neighbors(self, n):
+        """Yield (neighbour, effective weight) over the base graph and all layers."""
+        extra = {}
+        for layer in reversed(self.chain):  # upper layers override lower ones
+            nbrs = layer.extra_adj.get(n)
+            if nbrs:
+                extra.update(nbrs)
+        penalties = [layer.penalties for layer in self.chain if layer.penalties]
+        base_nbrs = self.base.adj[n] if n in self.base else {}
+        for v, w in extra.items():
+            yield v, self._apply_penalty(penalties, n, v, w)
+        for v, attrs in base_nbrs.items():
+            if v not in extra:
+                yield v, self._apply_penalty(penalties, n, v, attrs.get("weight", 1))
+
+    @staticmethod
+    def _apply_penalty(penalties, u, v, w):
+        for layer_penalties in penalties:
+            factor = layer_penalties.get((u, v))
+            if factor is not None:
+                return w * factor
+        return w
+
+    def shortest_path(self, source, target, heuristic=None):
+        """Dijkstra over the overlay, or A* when heuristic(node) (estimated distance to
+        target, admissible and consistent) is given. Raises nx.NodeNotFound /
+        nx.NetworkXNoPath like nx.shortest_path."""
+        for n in (source, target):
+            if not self.has_node(n):
+                raise nx.NodeNotFound(f"Node {n} not in graph")
+        dist = {source: 0.0}
+        pred = {source: None}
+        done = set()
+        heap = [(0.0, 0, 0.0, source)]
+        counter = 1
+        while heap:
+            _, _, d, n = heapq.heappop(heap)
+            if n in done:
+                continue
+            if n == target:
+                path = [n]
+                while pred[path[-1]] is not None:
+                    path.append(pred[path[-1]])
+                return path[::-1]
+            done.add(n)
+            for v, w in self.neighbors(n):
+                nd = d + w
+                if v not in done and nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    pred[v] = n
+                    priority = nd + heuristic(v) if heuristic is not None else nd
+                    heapq.heappush(heap, (priority, counter, nd, v))
+                    counter += 1
+        raise nx.NetworkXNoPath(f"No path between {source} and {target}")
@@ -4,57 +4,141 @@ following the shipping lane network only. Routes stay on lanes (no straight-line
 bridges across land). Ships that cannot reach Hamburg via lanes get no route.
 Writes data/routes.geojson.
 
-Run from project root: python geospatial_analysis/route_calculator.py
+Run from project root: python geospatial_analysis/route_calculator.py [--per-ship [--astar]]
+  --per-ship: one nx.shortest_path search per ship instead of a single shortest-path
+  tree from the destination
+  --astar:    per-ship searches use A* with a great-circle heuristic
 """
+import heapq
 import json
 import os
-import math
+import sys
+from array import array
 import networkx as nx
+import numpy as np
+import shapely
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+from scipy.spatial import cKDTree
 from shapely.geometry import LineString, Point
 
+import lane_graph_cache
+from contraction_hierarchy import ContractionHierarchy
+from geojson_stream import features_of, iter_features
+
 BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE, "data")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
 MAX_SEGMENT_KM = 80.0
 EARTH_R_KM = 6371.0
 
 
+def haversine_km_array(lon1, lat1, lon2, lat2):
+    """Great-circle km between coordinate arrays (broadcasting)."""
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_R_KM * 2 * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+
+
 def haversine_km(lon1, lat1, lon2, lat2):
-    lon1, lat1, lon2, lat2 = map(math.radians, [lon1, lat1, lon2, lat2])
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-    c = 2 * math.asin(math.sqrt(min(1, a)))
-    return EARTH_R_KM * c
+    return float(haversine_km_array(lon1, lat1, lon2, lat2))
 
 
 def _node_key(lon, lat):
     return (round(lon, 6), round(lat, 6))
 
 
-def _interpolate_line(coords, max_km):
-    out = []
-    for i in range(len(coords) - 1):
-        a, b = coords[i], coords[i + 1]
-        out.append(a)
-        dist_km = haversine_km(a[0], a[1], b[0], b[1])
-        if dist_km > max_km:
-            n = int(dist_km / max_km) + 1
-            for j in range(1, n):
-                t = j / n
-                out.append([
-                    a[0] + t * (b[0] - a[0]),
-                    a[1] + t * (b[1] - a[1])
-                ])
-    out.append(coords[-1])
+def densify_line(coords, max_km):
+    """Densify a whole [[lon, lat], ...] line in one pass: every segment longer than
+    max_km is split into int(km / max_km) + 1 equal lon/lat steps. Returns an (n, 2)
+    float64 array starting and ending at the original endpoints."""
+    pts = np.asarray(coords, dtype=np.float64)[:, :2]
+    if len(pts) < 2:
+        return pts.copy()
+    a, b = pts[:-1], pts[1:]
+    dist_km = haversine_km_array(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+    parts = np.where(dist_km > max_km, (dist_km / max_km).astype(np.int64) + 1, 1)
+    seg = np.repeat(np.arange(len(a)), parts)
+    step = np.arange(len(seg)) - np.repeat(np.cumsum(parts) - parts, parts)
+    t = (step / parts[seg])[:, None]
+    out = np.empty((len(seg) + 1, 2))
+    out[:-1] = a[seg] + t * (b[seg] - a[seg])
+    out[-1] = pts[-1]
     return out
 
 
-def build_lane_graph(lanes_geojson, bbox=None):
-    """bbox: (min_lon, min_lat, max_lon, max_lat) or None to include all."""
-    G = nx.Graph()
-    edge_geoms = {}  # (u, v) -> list of [lon,lat] for that edge's geometry (ordered)
-    features = lanes_geojson.get("features") or []
-    for feat in features:
+def _interpolate_line(coords, max_km):
+    return densify_line(coords, max_km).tolist()
+
+
+def _segment_lengths_km(pts):
+    """Haversine km of consecutive segments of an (n, 2) coordinate array."""
+    return haversine_km_array(pts[:-1, 0], pts[:-1, 1], pts[1:, 0], pts[1:, 1])
+
+
+def _unit_sphere_xyz(nodes):
+    """(lon, lat) nodes -> 3D points on the unit sphere. Chord length between them is
+    monotonic in great-circle distance, so KD-tree nearest = haversine nearest."""
+    ll = np.radians(np.asarray(nodes, dtype=np.float64).reshape(-1, 2))
+    cos_lat = np.cos(ll[:, 1])
+    return np.column_stack([cos_lat * np.cos(ll[:, 0]), cos_lat * np.sin(ll[:, 0]), np.sin(ll[:, 1])])
+
+
+class _GrowingKDTree:
+    """Nearest-neighbour search over a point set that only grows. Points live in
+    KD-trees of roughly doubling size (logarithmic method): an insert merges equal or
+    smaller trees, a query checks each of the O(log n) trees."""
+
+    def __init__(self):
+        self.blocks = []  # (cKDTree, node list), sizes decreasing
+
+    def add(self, xyz, nodes):
+        nodes = list(nodes)
+        while self.blocks and len(self.blocks[-1][1]) <= len(nodes):
+            tree, old_nodes = self.blocks.pop()
+            xyz = np.vstack([tree.data, xyz])
+            nodes = old_nodes + nodes
+        self.blocks.append((cKDTree(xyz), nodes))
+
+    def nearest_pair(self, xyz, nodes):
+        """(chord, tree node, query node) of the closest pair between the tree and xyz."""
+        best = (float("inf"), None, None)
+        for tree, tree_nodes in self.blocks:
+            dist, idx = tree.query(xyz, k=1)
+            i = int(np.argmin(dist))
+            if dist[i] < best[0]:
+                best = (float(dist[i]), tree_nodes[idx[i]], nodes[i])
+        return best
+
+
+def _component_bridges(comps, points):
+    """comps: node lists, largest first; points(nodes) -> unit-sphere xyz. Yields (n1, n2)
+    links joining each component to its nearest node in everything merged before it
+    (KD-tree search on the unit sphere)."""
+    main = _GrowingKDTree()
+    main.add(points(comps[0]), comps[0])
+    for other in comps[1:]:
+        xyz = points(other)
+        _, n1, n2 = main.nearest_pair(xyz, other)
+        if n1 is not None:
+            yield n1, n2
+        main.add(xyz, other)
+
+
+def build_lane_arrays(lanes_geojson, bbox=None):
+    """Lane graph built straight into LaneGraphArrays: one float64 coordinate array,
+    integer node ids and one edge-table row (u, v, weight, geometry offset) per
+    undirected edge. lanes_geojson: FeatureCollection dict or an iterable of features
+    (e.g. iter_features, so the graph is built while the file is still being read).
+    bbox: (min_lon, min_lat, max_lon, max_lat) or None to include all. This is what
+    load_lane_graph compiles the cache from."""
+    index = {}  # node key -> id
+    node_coords = array("d")
+    edge_u, edge_v = array("q"), array("q")
+    edge_w = array("d")
+    geom_coords = array("d")
+    seen = set()
+    for feat in features_of(lanes_geojson):
         geom = feat.get("geometry")
         if not geom:
             continue
@@ -70,109 +154,253 @@ def build_lane_graph(lanes_geojson, bbox=None):
                 min_lon, min_lat, max_lon, max_lat = bbox
                 if not any(min_lon <= c[0] <= max_lon and min_lat <= c[1] <= max_lat for c in line):
                     continue
-            pts = _interpolate_line(line, MAX_SEGMENT_KM)
+            pts = densify_line(line, MAX_SEGMENT_KM)
+            lengths_km = _segment_lengths_km(pts).tolist()
+            pts = pts.tolist()
             for i in range(len(pts) - 1):
                 p, q = pts[i], pts[i + 1]
                 u, v = _node_key(p[0], p[1]), _node_key(q[0], q[1])
                 if u == v:
                     continue
-                length_km = haversine_km(p[0], p[1], q[0], q[1])
-                if G.has_edge(u, v):
+                iu, iv = index.get(u), index.get(v)
+                if iu is not None and iv is not None and (min(iu, iv), max(iu, iv)) in seen:
                     continue
-                G.add_edge(u, v, weight=length_km)
-                edge_geoms[(u, v)] = [p, q]
-                edge_geoms[(v, u)] = [q, p]
-    return G, edge_geoms
+                for n in (u, v):
+                    if n not in index:
+                        index[n] = len(index)
+                        node_coords.extend(n)
+                iu, iv = index[u], index[v]
+                seen.add((min(iu, iv), max(iu, iv)))
+                edge_u.append(iu)
+                edge_v.append(iv)
+                edge_w.append(lengths_km[i])
+                geom_coords.extend((p[0], p[1], q[0], q[1]))
+    n_edges = len(edge_u)
+    return lane_graph_cache.LaneGraphArrays.from_edges(
+        np.frombuffer(node_coords, dtype=np.float64), np.frombuffer(edge_u, dtype=np.int64),
+        np.frombuffer(edge_v, dtype=np.int64), np.frombuffer(edge_w, dtype=np.float64),
+        np.arange(0, 2 * n_edges + 1, 2, dtype=np.int64), np.frombuffer(geom_coords, dtype=np.float64))
+
+
+def connect_lane_arrays(arrays):
+    """Connect disconnected lane components with shortest over-water links so paths can
+    be found from any ship to destination. Components (scipy.sparse.csgraph on the edge
+    table) are merged largest first, each linked to its nearest node in everything
+    merged so far. Returns arrays with the bridge edges appended; a bridge's geometry
+    is the straight line between its ends."""
+    n = arrays.n_nodes
+    if n == 0:
+        return arrays
+    edge_u, edge_v = np.asarray(arrays.edge_u), np.asarray(arrays.edge_v)
+    adjacency = csr_matrix((np.ones(len(edge_u)), (edge_u, edge_v)), shape=(n, n))
+    n_comps, labels = connected_components(adjacency, directed=False)
+    if n_comps <= 1:
+        return arrays
+    # Components largest first, ties by first node
+    order = np.argsort(labels, kind="stable")
+    starts = np.searchsorted(labels[order], np.arange(n_comps))
+    members = np.split(order, starts[1:])
+    sizes = np.bincount(labels, minlength=n_comps)
+    first = np.array([m[0] for m in members])
+    comps = [members[c].tolist() for c in np.lexsort((first, -sizes))]
+
+    coords = np.asarray(arrays.node_coords)
+    bridges = np.array(list(_component_bridges(comps, lambda ids: _unit_sphere_xyz(coords[ids]))),
+                       dtype=np.int64).reshape(-1, 2)
+    a, b = coords[bridges[:, 0]], coords[bridges[:, 1]]
+    weights = haversine_km_array(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+    geom_offsets = np.asarray(arrays.geom_offsets)
+    return lane_graph_cache.LaneGraphArrays.from_edges(
+        coords,
+        np.concatenate([edge_u, bridges[:, 0]]),
+        np.concatenate([edge_v, bridges[:, 1]]),
+        np.concatenate([np.asarray(arrays.edge_weight), weights]),
+        np.concatenate([geom_offsets, geom_offsets[-1] + 2 * np.arange(1, len(bridges) + 1)]),
+        np.concatenate([np.asarray(arrays.geom_coords), np.column_stack([a, b]).reshape(-1, 2)]))
+
+
+def load_lane_graph(lanes_path, bbox=None, cache_dir=CACHE_DIR):
+    """Return (G, edge_geoms) for the lanes file, connected across components. G is a
+    LaneGraph and edge_geoms an EdgeGeometries view, both over the compiled arrays.
+    Uses the compiled graph in cache_dir when its key (lanes file hash + bbox) matches,
+    otherwise builds it from the GeoJSON and writes the cache for the next run."""
+    key = lane_graph_cache.graph_key(lanes_path, bbox, MAX_SEGMENT_KM)
+    path = lane_graph_cache.cache_path(cache_dir, key)
+    arrays = lane_graph_cache.read_lane_graph(path, key)
+    if arrays is not None:
+        return lane_graph_cache.arrays_to_graph(arrays)
+    # Stream the lanes: features outside the bbox are dropped while parsing
+    arrays = connect_lane_arrays(build_lane_arrays(iter_features(lanes_path, bbox=bbox), bbox=bbox))
+    lane_graph_cache.write_lane_graph(path, arrays, key)
+    return lane_graph_cache.arrays_to_graph(arrays)
+
+
+def load_contraction_hierarchy(lanes_path, bbox=None, cache_dir=CACHE_DIR):
+    """ContractionHierarchy for the same graph load_lane_graph returns, stored next to
+    it in cache_dir (built on first use)."""
+    key = lane_graph_cache.graph_key(lanes_path, bbox, MAX_SEGMENT_KM)
+    path = lane_graph_cache.cache_path(cache_dir, key, "ch")
+    ch = ContractionHierarchy.load(path, key)
+    if ch is None:
+        G, _ = load_lane_graph(lanes_path, bbox=bbox, cache_dir=cache_dir)
+        ch = ContractionHierarchy.build(G)
+        ch.save(path, key)
+    return ch
+
+
+def fleet_bbox(ships, dests, pad=15.0):
+    """Bbox around all ships + destinations with padding, or None if there are no points.
+    ships/dests: FeatureCollection dicts or iterables of features (read once)."""
+    all_lons, all_lats = [], []
+    for f in features_of(ships):
+        c = f.get("geometry", {}).get("coordinates") or []
+        if len(c) >= 2:
+            all_lons.append(c[0])
+            all_lats.append(c[1])
+    for f in features_of(dests):
+        c = (f.get("geometry") or {}).get("coordinates")
+        if c and len(c) >= 2:
+            all_lons.append(c[0])
+            all_lats.append(c[1])
+    return (min(all_lons) - pad, min(all_lats) - pad, max(all_lons) + pad, max(all_lats) + pad) if all_lons else None
 
 
-def connect_disconnected_components(G, edge_geoms=None):
-    """Connect disconnected lane components with shortest over-water links so paths can be found
-    from any ship to destination. Bridge edges get straight-line geometry for drawing."""
-    comps = list(nx.connected_components(G))
-    if len(comps) <= 1:
-        return
-    comps = sorted(comps, key=len, reverse=True)
-    main = set(comps[0])
-    for other in comps[1:]:
-        best_d = float("inf")
-        best_pair = None
-        for n1 in main:
-            for n2 in other:
-                d = haversine_km(n1[0], n1[1], n2[0], n2[1])
-                if d < best_d:
-                    best_d = d
-                    best_pair = (n1, n2)
-        if best_pair:
-            n1, n2 = best_pair
-            G.add_edge(n1, n2, weight=best_d)
-            if edge_geoms is not None:
-                edge_geoms[(n1, n2)] = [[n1[0], n1[1]], [n2[0], n2[1]]]
-                edge_geoms[(n2, n1)] = [[n2[0], n2[1]], [n1[0], n1[1]]]
-            main |= other
-
-
-def nearest_point_on_network(G, edge_geoms, lon, lat):
-    pt = Point(lon, lat)
-    best = None
-    best_dist = float("inf")
-    best_t = 0.0
-    best_segment = None
-    for (u, v), geom in edge_geoms.items():
-        if len(geom) < 2:
-            continue
-        line = LineString(geom)
-        proj = line.project(pt, normalized=True)
-        proj = max(0, min(1, proj))
-        interp = line.interpolate(proj, normalized=True)
-        x, y = interp.x, interp.y
-        d = haversine_km(lon, lat, x, y)
-        if d < best_dist:
-            best_dist = d
-            best = (x, y)
-            best_t = proj
-            best_segment = (u, v)
-    return best, best_dist, best_segment
-
-
-def snap_to_network(G, edge_geoms, lon, lat, prefix="snap"):
+class SegmentIndex:
+    """STRtree over the lane segments in edge_geoms, built once per graph.
+
+    Each undirected edge is indexed once (edge_geoms holds both directions). Queries
+    return the same (best, best_dist, best_segment) as nearest_point_on_network.
+    Segments added to the graph after the index was built (snap/ship attachments)
+    are not indexed; snap edges lie on indexed segments anyway.
+    """
+
+    def __init__(self, edge_geoms):
+        if isinstance(edge_geoms, lane_graph_cache.EdgeGeometries) and not edge_geoms.extra:
+            self._index_arrays(edge_geoms)
+        else:
+            self.segments = []
+            geoms = []
+            seen = set()
+            for (u, v), geom in edge_geoms.items():
+                if len(geom) < 2 or (v, u) in seen:
+                    continue
+                seen.add((u, v))
+                self.segments.append((u, v))
+                geoms.append(geom)
+            self.lines = np.array([LineString(g) for g in geoms], dtype=object)
+        self.tree = shapely.STRtree(self.lines)
+
+    def _index_arrays(self, edge_geoms):
+        """Segments straight from the compiled arrays: one shapely.linestrings call over
+        geom_coords split at geom_offsets, in edge order (same result as the loop)."""
+        a = edge_geoms.arrays
+        counts = np.diff(np.asarray(a.geom_offsets))
+        edges = np.flatnonzero(counts >= 2)
+        nodes = edge_geoms.nodes
+        self.segments = [(nodes[i], nodes[j]) for i, j in zip(np.asarray(a.edge_u)[edges].tolist(),
+                                                               np.asarray(a.edge_v)[edges].tolist())]
+        if len(edges) == 0:
+            self.lines = np.empty(0, dtype=object)
+            return
+        coords = np.asarray(a.geom_coords)[np.repeat(counts >= 2, counts)]
+        self.lines = shapely.linestrings(coords, indices=np.repeat(np.arange(len(edges)), counts[edges]))
+
+    def __len__(self):
+        return len(self.segments)
+
+    def nearest(self, lon, lat):
+        return self.nearest_many([lon], [lat])[0]
+
+    def nearest_many(self, lons, lats):
+        """Nearest network point for every (lon, lat) in one vectorized pass.
+        Returns a list of (best, best_dist_km, best_segment) per input point."""
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        n = len(lons)
+        if n == 0:
+            return []
+        if len(self.segments) == 0:
+            return [(None, float("inf"), None)] * n
+        pts = shapely.points(lons, lats)
+        # Planar (degree) nearest distance bounds the search: a segment further than
+        # d0 / cos(lat) degrees away cannot be closer in km than the planar nearest one.
+        (pt_idx, _), planar_d = self.tree.query_nearest(pts, return_distance=True)
+        d0 = np.zeros(n)
+        d0[pt_idx] = planar_d
+        lat_max = np.minimum(np.abs(lats) + 2 * d0 + 1e-9, 89.0)
+        radius = d0 / np.cos(np.radians(lat_max)) + 1e-9
+        pt_idx, seg_idx = self.tree.query(pts, predicate="dwithin", distance=radius)
+
+        lines = self.lines[seg_idx]
+        proj = np.clip(shapely.line_locate_point(lines, pts[pt_idx], normalized=True), 0, 1)
+        xy = shapely.get_coordinates(shapely.line_interpolate_point(lines, proj, normalized=True))
+        d = haversine_km_array(lons[pt_idx], lats[pt_idx], xy[:, 0], xy[:, 1])
+
+        # Per point: smallest distance, ties broken by edge_geoms order like the linear scan
+        order = np.lexsort((seg_idx, d, pt_idx))
+        first = order[np.r_[True, pt_idx[order][1:] != pt_idx[order][:-1]]]
+        results = [(None, float("inf"), None)] * n
+        for k in first.tolist():
+            results[pt_idx[k]] = ((float(xy[k, 0]), float(xy[k, 1])), float(d[k]), self.segments[seg_idx[k]])
+        return results
+
+
+def nearest_point_on_network(G, edge_geoms, lon, lat, index=None):
+    """Nearest point on the lane network to (lon, lat). With a SegmentIndex this is an
+    STRtree query; without one every edge geometry is scanned (in one vectorized pass)."""
+    if index is not None:
+        return index.nearest(lon, lat)
+    segments = [(key, geom) for key, geom in edge_geoms.items() if len(geom) >= 2]
+    if not segments:
+        return None, float("inf"), None
+    sizes = [len(geom) for _, geom in segments]
+    coords = np.array([c[:2] for _, geom in segments for c in geom], dtype=np.float64)
+    lines = shapely.linestrings(coords, indices=np.repeat(np.arange(len(segments)), sizes))
     pt = Point(lon, lat)
-    best, best_dist, best_segment = nearest_point_on_network(G, edge_geoms, lon, lat)
-    if best_segment is None:
-        return None, None
+    proj = np.clip(shapely.line_locate_point(lines, pt, normalized=True), 0, 1)
+    xy = shapely.get_coordinates(shapely.line_interpolate_point(lines, proj, normalized=True))
+    d = haversine_km_array(lon, lat, xy[:, 0], xy[:, 1])
+    i = int(np.argmin(d))  # first minimum, like the strict < scan
+    return (float(xy[i, 0]), float(xy[i, 1])), float(d[i]), segments[i][0]
+
+
+def _attach_snap_node(G, edge_geoms, best, best_segment):
+    """Add the snap point best on edge best_segment as a node linked to both ends."""
     u, v = best_segment
     snap_key = (round(best[0], 6), round(best[1], 6))
-    if snap_key == u or snap_key == v:
-        return snap_key, 0.0
     if not G.has_node(snap_key):
         G.add_node(snap_key)
-        d1 = haversine_km(best[0], best[1], u[0], u[1])
-        d2 = haversine_km(best[0], best[1], v[0], v[1])
+        d1, d2 = haversine_km_array(best[0], best[1], [u[0], v[0]], [u[1], v[1]]).tolist()
         G.add_edge(snap_key, u, weight=d1)
         G.add_edge(snap_key, v, weight=d2)
         edge_geoms[(snap_key, u)] = [list(best), list(u)]
         edge_geoms[(u, snap_key)] = [list(u), list(best)]
         edge_geoms[(snap_key, v)] = [list(best), list(v)]
         edge_geoms[(v, snap_key)] = [list(v), list(best)]
-    return snap_key, best_dist
+    return snap_key
 
 
-def add_off_network_point(G, edge_geoms, lon, lat, node_id):
-    best, best_dist, best_segment = nearest_point_on_network(G, edge_geoms, lon, lat)
+def _snap_nearest(G, edge_geoms, nearest):
+    best, best_dist, best_segment = nearest
     if best_segment is None:
-        return None
+        return None, None
     u, v = best_segment
     snap_key = (round(best[0], 6), round(best[1], 6))
+    if snap_key == u or snap_key == v:
+        return snap_key, 0.0
+    return _attach_snap_node(G, edge_geoms, best, best_segment), best_dist
+
+
+def snap_to_network(G, edge_geoms, lon, lat, prefix="snap", index=None):
+    return _snap_nearest(G, edge_geoms, nearest_point_on_network(G, edge_geoms, lon, lat, index=index))
+
+
+def add_off_network_point(G, edge_geoms, lon, lat, node_id, index=None):
+    best, best_dist, best_segment = nearest_point_on_network(G, edge_geoms, lon, lat, index=index)
+    if best_segment is None:
+        return None
     G.add_node(node_id, coords=[lon, lat])
-    if not G.has_node(snap_key):
-        G.add_node(snap_key)
-        d1 = haversine_km(best[0], best[1], u[0], u[1])
-        d2 = haversine_km(best[0], best[1], v[0], v[1])
-        G.add_edge(snap_key, u, weight=d1)
-        G.add_edge(snap_key, v, weight=d2)
-        edge_geoms[(snap_key, u)] = [list(best), list(u)]
-        edge_geoms[(u, snap_key)] = [list(u), list(best)]
-        edge_geoms[(snap_key, v)] = [list(best), list(v)]
-        edge_geoms[(v, snap_key)] = [list(v), list(best)]
+    snap_key = _attach_snap_node(G, edge_geoms, best, best_segment)
     dist = haversine_km(lon, lat, best[0], best[1])
     G.add_edge(node_id, snap_key, weight=dist)
     edge_geoms[(node_id, snap_key)] = [[lon, lat], list(best)]
@@ -180,6 +408,119 @@ def add_off_network_point(G, edge_geoms, lon, lat, node_id):
     return snap_key
 
 
+def node_lonlat(G, n):
+    """(lon, lat) of a lane node (tuple key) or an off-network node ("coords" attribute)."""
+    if isinstance(n, str):
+        c = G.nodes[n].get("coords")
+        return c[0], c[1]
+    return n[0], n[1]
+
+
+def great_circle_heuristic(G, target):
+    """A* heuristic: great-circle km from a node to target. Admissible (and consistent)
+    because every edge weight is the haversine length of its segment, and buffer
+    penalties only multiply weights by factors >= 1."""
+    tlon, tlat = node_lonlat(G, target)
+
+    def heuristic(u, _target=None):
+        lon, lat = node_lonlat(G, u)
+        return haversine_km(lon, lat, tlon, tlat)
+    return heuristic
+
+
+def shortest_lane_path(G, source, target, astar=False):
+    """nx.shortest_path by weight, or A* with great_circle_heuristic when astar=True."""
+    if isinstance(G, lane_graph_cache.LaneGraph):
+        G = G.to_networkx()
+    if astar:
+        return nx.astar_path(G, source, target, heuristic=great_circle_heuristic(G, target), weight="weight")
+    return nx.shortest_path(G, source, target, weight="weight")
+
+
+class ShortestPathTree:
+    """Shortest paths from every node of a LaneGraph to one target, from a single
+    csgraph Dijkstra run over its sparse matrix started at the target (lane edges are
+    undirected). Build once, then query per vessel with path()/distance().
+
+    Nodes added to G after the tree was built (snap and off-network ship nodes) are
+    resolved with a small search through the new nodes until it reaches the tree.
+    """
+
+    def __init__(self, G, target, weight="weight"):
+        self.G = G
+        self.target = target
+        self.weight = weight
+        self.target_id = G.node_id(target)
+        if self.target_id is None:
+            raise nx.NodeNotFound(f"Node {target} not in graph")
+        self.dist, self.pred = dijkstra(G.to_csgraph(), directed=True, indices=self.target_id,
+                                        return_predecessors=True)
+
+    def _tree_distance(self, node):
+        """Distance from node to the target through the tree (None if not in it)."""
+        i = self.G.node_id(node)
+        if i is None or i >= len(self.dist) or not np.isfinite(self.dist[i]):
+            return None
+        return float(self.dist[i])
+
+    def __contains__(self, node):
+        return self._tree_distance(node) is not None
+
+    def _tree_path(self, node):
+        i = self.G.node_id(node)
+        path = [node]
+        while i != self.target_id:
+            i = int(self.pred[i])
+            path.append(self.G.node_key(i))
+        return path
+
+    def _resolve(self, node):
+        """(total distance, path to first tree node) for a node outside the tree."""
+        if node not in self.G:
+            raise nx.NodeNotFound(f"Node {node} not in graph")
+        best = (float("inf"), None)
+        seen = {node: (0.0, None)}
+        heap = [(0.0, 0, node)]
+        counter = 1
+        while heap:
+            d, _, n = heapq.heappop(heap)
+            if d >= best[0]:
+                break
+            if d > seen[n][0]:
+                continue
+            for nb, attrs in self.G[n].items():
+                nd = d + attrs.get(self.weight, 1)
+                tree_d = self._tree_distance(nb)
+                if tree_d is not None:
+                    if nd + tree_d < best[0]:
+                        best = (nd + tree_d, (n, nb))
+                elif nb not in seen or nd < seen[nb][0]:
+                    seen[nb] = (nd, n)
+                    heapq.heappush(heap, (nd, counter, nb))
+                    counter += 1
+        if best[1] is None:
+            raise nx.NetworkXNoPath(f"No path from {node} to {self.target}")
+        last, entry = best[1]
+        prefix = [entry, last]
+        while seen[last][1] is not None:
+            last = seen[last][1]
+            prefix.append(last)
+        return best[0], prefix[::-1]
+
+    def distance(self, node):
+        tree_d = self._tree_distance(node)
+        if tree_d is not None:
+            return tree_d
+        return self._resolve(node)[0]
+
+    def path(self, node):
+        """Node path from node to the target, like nx.shortest_path(G, node, target)."""
+        if node in self:
+            return self._tree_path(node)
+        _, prefix = self._resolve(node)
+        return prefix[:-1] + self._tree_path(prefix[-1])
+
+
 def expand_path_to_geometry(G, edge_geoms, path):
     if not path or len(path) < 2:
         return None
@@ -200,35 +541,49 @@ def expand_path_to_geometry(G, edge_geoms, path):
     return coords
 
 
-def main():
+def route_between_points(ch, G, edge_geoms, index, lon1, lat1, lon2, lat2):
+    """Shortest lane route between two arbitrary positions (vessel, port) through the
+    contraction hierarchy ch. Each point joins its nearest lane segment as in
+    add_off_network_point, without modifying G. Returns (distance_km, coords) with
+    coords shaped like expand_path_to_geometry output, or (inf, None)."""
+    ends = []
+    for lon, lat in ((lon1, lat1), (lon2, lat2)):
+        best, best_dist, segment = index.nearest(lon, lat)
+        if segment is None:
+            return float("inf"), None
+        leg = haversine_km(lon, lat, best[0], best[1])
+        offsets = {n: leg + haversine_km(best[0], best[1], n[0], n[1]) for n in segment}
+        ends.append((best, leg, segment, offsets))
+    (best1, leg1, seg1, src), (best2, leg2, seg2, dst) = ends
+
+    dist, path = ch.query_attached(src, dst)
+    if set(seg1) == set(seg2):
+        direct = leg1 + haversine_km(best1[0], best1[1], best2[0], best2[1]) + leg2
+        if direct <= dist:
+            return direct, [[lon1, lat1], list(best1), list(best2), [lon2, lat2]]
+    if path is None:
+        return float("inf"), None
+    middle = expand_path_to_geometry(G, edge_geoms, path) or [list(path[0])]
+    return dist, [[lon1, lat1], list(best1)] + middle + [list(best2), [lon2, lat2]]
+
+
+def main(single_source=True, astar=False):
+    """single_source: route all ships with one ShortestPathTree from the destination
+    (default); False runs one search per ship (--per-ship), A* if astar (--astar)."""
     lanes_path = os.path.join(DATA_DIR, "Shipping_Lanes_v1.geojson")
     ships_path = os.path.join(DATA_DIR, "shipping_data.geojson")
     dest_path = os.path.join(DATA_DIR, "destinations.geojson")
     routes_path = os.path.join(DATA_DIR, "routes.geojson")
 
-    with open(lanes_path, "r", encoding="utf-8") as f:
-        lanes = json.load(f)
-    with open(ships_path, "r", encoding="utf-8") as f:
-        ships = json.load(f)
-    with open(dest_path, "r", encoding="utf-8") as f:
-        dests = json.load(f)
+    dest_features = list(iter_features(dest_path))
 
     # Bbox: ships + Hamburg + padding to keep graph manageable
-    all_lons = [c[0] for f in ships.get("features") or [] for c in [f.get("geometry", {}).get("coordinates") or []] if len(c) >= 2]
-    all_lats = [c[1] for f in ships.get("features") or [] for c in [f.get("geometry", {}).get("coordinates") or []] if len(c) >= 2]
-    for f in dests.get("features") or []:
-        c = (f.get("geometry") or {}).get("coordinates")
-        if c and len(c) >= 2:
-            all_lons.append(c[0])
-            all_lats.append(c[1])
-    pad = 15.0
-    bbox = (min(all_lons) - pad, min(all_lats) - pad, max(all_lons) + pad, max(all_lats) + pad) if all_lons else None
+    bbox = fleet_bbox(iter_features(ships_path), dest_features)
 
-    G, edge_geoms = build_lane_graph(lanes, bbox=bbox)
-    # Connect disconnected lane regions with shortest over-water links so far-away ships can route to Hamburg
-    connect_disconnected_components(G, edge_geoms)
+    # Lane graph with disconnected regions bridged by shortest over-water links
+    # (compiled once, then loaded from data/cache/)
+    G, edge_geoms = load_lane_graph(lanes_path, bbox=bbox)
 
-    dest_features = dests.get("features") or []
     dest_point = None
     if dest_features:
         g = dest_features[0].get("geometry")
@@ -240,33 +595,46 @@ def main():
         return
 
     dest_name = (dest_features[0].get("properties") or {}).get("name") or "Hamburg"
-    dest_node, _ = snap_to_network(G, edge_geoms, dest_point[0], dest_point[1])
+    index = SegmentIndex(edge_geoms)
+    dest_node, _ = snap_to_network(G, edge_geoms, dest_point[0], dest_point[1], index=index)
     if dest_node is None:
         dest_node_id = "dest"
-        add_off_network_point(G, edge_geoms, dest_point[0], dest_point[1], dest_node_id)
+        add_off_network_point(G, edge_geoms, dest_point[0], dest_point[1], dest_node_id, index=index)
     else:
         dest_node_id = dest_node
 
-    routes_features = []
-    ship_features = ships.get("features") or []
-    for idx, ship in enumerate(ship_features):
+    # One Dijkstra from the destination serves every ship (all ships route to it)
+    tree = ShortestPathTree(G, dest_node_id) if single_source else None
+
+    ships_on_map = []
+    for idx, ship in enumerate(iter_features(ships_path)):
         geom = ship.get("geometry")
         if not geom or geom.get("type") != "Point" or not geom.get("coordinates"):
             continue
         coords = geom["coordinates"]
-        lon, lat = float(coords[0]), float(coords[1])
+        ships_on_map.append((idx, ship, float(coords[0]), float(coords[1])))
+
+    # Nearest network point for every ship in one index query; snap nodes are still
+    # attached ship by ship so each path sees the same graph as a sequential snap
+    nearest = index.nearest_many([s[2] for s in ships_on_map], [s[3] for s in ships_on_map])
+
+    routes_features = []
+    for (idx, ship, lon, lat), ship_nearest in zip(ships_on_map, nearest):
         props = ship.get("properties") or {}
         vessel = props.get("vessel_name") or f"Ship_{idx}"
 
-        ship_node, _ = snap_to_network(G, edge_geoms, lon, lat)
+        ship_node, _ = _snap_nearest(G, edge_geoms, ship_nearest)
         if ship_node is None:
             ship_node_id = f"ship_{idx}"
-            add_off_network_point(G, edge_geoms, lon, lat, ship_node_id)
+            add_off_network_point(G, edge_geoms, lon, lat, ship_node_id, index=index)
         else:
             ship_node_id = ship_node
 
         try:
-            path = nx.shortest_path(G, ship_node_id, dest_node_id, weight="weight")
+            if tree is not None:
+                path = tree.path(ship_node_id)
+            else:
+                path = shortest_lane_path(G, ship_node_id, dest_node_id, astar=astar)
         except (nx.NetworkXNoPath, nx.NodeNotFound):
             continue
 
@@ -305,4 +673,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(single_source="--per-ship" not in sys.argv[1:], astar="--astar" in sys.argv[1:])
@@ -0,0 +1,86 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "geospatial_analysis"))
+
+import lane_graph_cache
+
+
+def _write_sample(path):
+    arrays = {"a": np.arange(100, dtype=np.float64), "b": np.arange(50, dtype=np.int64)}
+    lane_graph_cache.write_arrays(path, arrays, "key")
+    return arrays
+
+
+def test_read_arrays_round_trip(tmp_path):
+    path = str(tmp_path / "sample.lanegraph")
+    arrays = _write_sample(path)
+    loaded = lane_graph_cache.read_arrays(path, "key")
+    assert loaded is not None
+    for name, arr in arrays.items():
+        np.testing.assert_array_equal(loaded[name], arr)
+
+
+def test_read_arrays_truncated_returns_none(tmp_path):
+    path = str(tmp_path / "sample.lanegraph")
+    _write_sample(path)
+    size = os.path.getsize(path)
+    # Inside the data, inside the header and inside the header length
+    for keep in (size - 8, 40, 12):
+        with open(path, "r+b") as f:
+            f.truncate(keep)
+        assert lane_graph_cache.read_arrays(path, "key") is None
+
+
+def test_read_arrays_corrupt_header_returns_none(tmp_path):
+    path = str(tmp_path / "sample.lanegraph")
+    _write_sample(path)
+    with open(path, "r+b") as f:
+        f.seek(len(lane_graph_cache.MAGIC) + 8)
+        f.write(b"\xff\xfe{not json")
+    assert lane_graph_cache.read_arrays(path, "key") is None
+    assert lane_graph_cache.read_lane_graph(path, "key") is None
+
+
+def _sample_graph():
+    # Square 0-1-2-3 with a diagonal 0-2, one straight segment per edge
+    coords = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    edge_u = np.array([0, 1, 2, 3, 0])
+    edge_v = np.array([1, 2, 3, 0, 2])
+    geom_offsets = np.arange(0, 2 * len(edge_u) + 1, 2)
+    geom_coords = np.column_stack([coords[edge_u], coords[edge_v]]).reshape(-1, 2)
+    arrays = lane_graph_cache.LaneGraphArrays.from_edges(
+        coords, edge_u, edge_v, np.array([1.0, 1.0, 1.0, 1.0, 1.5]), geom_offsets, geom_coords)
+    return lane_graph_cache.arrays_to_graph(arrays)
+
+
+def test_lane_graph_matches_networkx():
+    G, _ = _sample_graph()
+    G.add_node("ship", coords=[2.0, 2.0])
+    G.add_edge("ship", (1.0, 1.0), weight=0.5)
+    H = G.to_networkx()
+    assert G.number_of_nodes() == H.number_of_nodes() == 5
+    assert G.number_of_edges() == H.number_of_edges() == 6
+    for n in H.nodes():
+        assert n in G
+        assert G[n] == dict(H[n])
+    assert G.nodes["ship"] == {"coords": [2.0, 2.0]}
+    assert G.has_edge((0.0, 0.0), (1.0, 1.0)) and not G.has_edge((1.0, 0.0), (0.0, 1.0))
+    # Later additions show up in the networkx copy too
+    G.add_edge("ship", (0.0, 1.0), weight=2.0)
+    assert H["ship"][(0.0, 1.0)]["weight"] == 2.0
+
+
+def test_lane_graph_csgraph_and_read_only_edges():
+    from scipy.sparse.csgraph import dijkstra
+
+    G, _ = _sample_graph()
+    G.add_edge("dest", (0.0, 1.0), weight=0.25)
+    dist = dijkstra(G.to_csgraph(), directed=True, indices=G.node_id("dest"))
+    assert dist[G.node_id((1.0, 1.0))] == 1.25
+    assert dist[G.node_id((1.0, 0.0))] == 2.25
+    with pytest.raises(ValueError):
+        G.add_edge((0.0, 0.0), (1.0, 0.0), weight=5.0)
@@ -1,68 +1,148 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, model_validator
+from typing import NamedTuple, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import functools
+import hashlib
 import json
-import pandas as pd
-from simulation_engine import MonteCarloSimulator
+from compute_pool import ComputePool, PoolSaturated
+from dataset_watcher import DatasetWatcher
+from response_cache import ResponseCache
+from simulation_engine import MonteCarloSimulator, QUINTILES
 from routing_engine import RoutingEngine
-
-app = FastAPI(title="Intelligent Decision Support API")
+from vessel_store import VesselStore
 
 # Initialize engines
 simulator = MonteCarloSimulator(base_hourly_cost=1000)
 router = RoutingEngine()
 
+# Response cache for the simulate / report endpoints
+response_cache = ResponseCache(maxsize=1024, ttl_seconds=300)
+
+# Simulation and routing run here, off the event loop (429 when full, 504 on timeout)
+compute_pool = ComputePool(timeout_seconds=30)
+
 # Data Loading
-vessels_data = []
-avg_distance_km = 5000 # Default fallback
-avg_cargo_value = 500000 # Default fallback
+DATASET_PATH = "Lena Case 31.01.26.json"
+DATASET_POLL_SECONDS = 5
 
-try:
-    with open("Lena Case 31.01.26.json") as f:
-        data = json.load(f)
-        
-    total_dist = 0
-    total_val = 0
-    count = 0
-    
-    for feature in data.get("features", []):
-        props = feature.get("properties", {})
-        # Lena Case file doesn't have "feature_kind", check for vessel attributes
-        if "vessel_name" in props:
-            vessels_data.append(feature)
-            
-            # Calculate stats
-            dist_nm = props.get("dist_hamburg_nm", 0)
-            val_eur = props.get("value_eur", 0)
-            
-            # Convert NM to KM
-            dist_km = dist_nm * 1.852
-            total_dist += dist_km
-            
-            # Convert EUR to USD (approx 1.08)
-            val_usd = val_eur * 1.08
-            total_val += val_usd
-            
-            count += 1
-            
-            # Add fields expected by the rest of the app (Contract ID etc)
-            props["contract_id"] = f"LENA-{count}"
-            props["route_name"] = f"Hamburg Route: {props.get('vessel_name')}"
-            props["cargo_value_usd"] = val_usd
-            # Heuristic for penalty based on value (e.g. 0.01% per hour)
-            props["late_penalty_usd_per_hour"] = val_usd * 0.0001 
-            props["client_importance"] = "High"
-
-    if count > 0:
-        avg_distance_km = total_dist / count
-        avg_cargo_value = total_val / count
-        print(f"Loaded {count} vessels. Avg Dist: {avg_distance_km:.2f}km, Avg Value: ${avg_cargo_value:.2f}")
-
-except FileNotFoundError:
-    print("Warning: Lena Case 31.01.26.json not found, using defaults.")
+class Dataset(NamedTuple):
+    """
+    Everything served from one fleet snapshot. Replaced as a whole on reload, so a
+    handler that reads `dataset` once sees a consistent store, averages and version.
+    """
+    store: VesselStore
+    avg_distance_km: float
+    avg_cargo_value: float
+
+    @property
+    def version(self):
+        # Content hash of the snapshot, part of every cache key
+        return self.store.version
+
+DEFAULT_DATASET = Dataset(VesselStore.empty(), 5000, 500000) # Fallback when no file is present
+dataset = DEFAULT_DATASET
+
+def build_dataset(path=DATASET_PATH):
+    """
+    Parses a vessel snapshot into a Dataset (columnar store plus fleet averages).
+    Does not touch the served data, so it can run on the watcher thread.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    store = VesselStore.from_geojson(json.loads(raw), version=hashlib.sha256(raw).hexdigest()[:12])
+    if len(store) == 0:
+        return DEFAULT_DATASET._replace(store=store)
+    return Dataset(store, store.avg_distance_km, store.avg_cargo_value)
+
+def swap_dataset(new_dataset):
+    """
+    Atomically replaces the served dataset (a single reference assignment) and drops
+    the cache entries of the previous version. A touched but unchanged file is a no-op.
+    """
+    global dataset
+    if new_dataset.version == dataset.version:
+        return
+    dataset = new_dataset
+    response_cache.clear()
+    store = new_dataset.store
+    print(f"Loaded {len(store)} vessels (version {store.version}). "
+          f"Avg Dist: {new_dataset.avg_distance_km:.2f}km, Avg Value: ${new_dataset.avg_cargo_value:.2f}")
+
+# Reloads the snapshot in the background whenever the file changes
+dataset_watcher = DatasetWatcher(DATASET_PATH, build_dataset, swap_dataset, interval_seconds=DATASET_POLL_SECONDS)
+if not dataset_watcher.poll() and dataset_watcher.last_error is None:
+    print(f"Warning: {DATASET_PATH} not found, using defaults.")
+
+@asynccontextmanager
+async def lifespan(app):
+    dataset_watcher.start()
+    yield
+    dataset_watcher.stop()
+
+app = FastAPI(title="Intelligent Decision Support API", lifespan=lifespan)
 
 
 # Request Models
-class DelayRequest(BaseModel):
+MAX_SIMULATIONS = 10_000_000
+
+MAX_FLEET_SAMPLES = 20_000_000 # vessels x n_simulations per fleet request
+
+MAX_EXPECTED_DELAY_HOURS = 1_000_000 # Bounds the Poisson mean of every scenario
+
+def check_expected_delay_hours(hours):
+    if not hours <= MAX_EXPECTED_DELAY_HOURS: # also rejects NaN
+        raise ValueError(f"Expected delay must be at most {MAX_EXPECTED_DELAY_HOURS} hours")
+
+class MonteCarloOptions(BaseModel):
+    seed: Optional[int] = None # Makes a sampling run reproducible
+    n_simulations: int = 1000 # Large runs are split across the simulator's threads
+
+    @field_validator('seed')
+    @classmethod
+    def check_seed(cls, v):
+        if v is not None and v < 0:
+            raise ValueError('Must be non-negative')
+        return v
+
+    @field_validator('n_simulations')
+    @classmethod
+    def check_n_simulations(cls, v):
+        if not 1 <= v <= MAX_SIMULATIONS:
+            raise ValueError(f'Must be between 1 and {MAX_SIMULATIONS}')
+        return v
+
+class SamplingOptions(MonteCarloOptions):
+    exact: bool = True # Poisson CDF instead of Monte Carlo sampling
+    # Adaptive sampling: draw until the standard errors are <= rel_tol * |mean|
+    rel_tol: Optional[float] = None
+    max_simulations: int = 1_000_000 # Cap for adaptive runs
+
+    @field_validator('max_simulations')
+    @classmethod
+    def check_max_simulations(cls, v):
+        if not 1 <= v <= MAX_SIMULATIONS:
+            raise ValueError(f'Must be between 1 and {MAX_SIMULATIONS}')
+        return v
+
+    @field_validator('rel_tol')
+    @classmethod
+    def check_rel_tol(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('Must be positive')
+        return v
+
+    @model_validator(mode='after')
+    def check_sampling_mode(self):
+        # rel_tol asks for adaptive sampling, which the exact default would ignore
+        if self.rel_tol is not None:
+            if self.exact and 'exact' in self.model_fields_set:
+                raise ValueError('rel_tol requires exact=false (adaptive sampling)')
+            self.exact = False
+        return self
+
+class DelayRequest(SamplingOptions):
     expected_delay_hours: float
     contract_penalty_per_hour: float = 0 # Optional override
     spoilage_rate_12h: float = 0.30 # Default 30% per 12h
@@ -74,7 +154,13 @@ class DelayRequest(BaseModel):
             raise ValueError('Must be non-negative')
         return v
 
-class BlockageRequest(BaseModel):
+    @field_validator('expected_delay_hours')
+    @classmethod
+    def check_expected_delay(cls, v):
+        check_expected_delay_hours(v)
+        return v
+
+class BlockageRequest(SamplingOptions):
     expected_duration_half_days: float
     contract_penalty_per_hour: float = 0
     spoilage_rate_12h: float = 0.30
@@ -86,7 +172,13 @@ class BlockageRequest(BaseModel):
             raise ValueError('Must be non-negative')
         return v
 
-class AgentReportRequest(BaseModel):
+    @field_validator('expected_duration_half_days')
+    @classmethod
+    def check_expected_duration(cls, v):
+        check_expected_delay_hours(v * 12)
+        return v
+
+class AgentReportRequest(SamplingOptions):
     scenario_type: str # 'delay' or 'blockage'
     input_value: float # hours or half_days
     spoilage_rate_12h: float = 0.30
@@ -98,37 +190,124 @@ class AgentReportRequest(BaseModel):
             raise ValueError('Must be non-negative')
         return v
 
+    @model_validator(mode='after')
+    def check_input_value(self):
+        check_expected_delay_hours(self.input_value * (12 if self.scenario_type == 'blockage' else 1))
+        return self
+
+class FleetRequest(MonteCarloOptions):
+    scenario_type: str # 'delay' or 'blockage'
+    input_value: float # hours or half_days
+    spoilage_rate_12h: float = 0.30
+
+    @field_validator('input_value', 'spoilage_rate_12h')
+    @classmethod
+    def check_non_negative(cls, v):
+        if v < 0:
+            raise ValueError('Must be non-negative')
+        return v
+
+    @model_validator(mode='after')
+    def check_input_value(self):
+        check_expected_delay_hours(self.input_value * (12 if self.scenario_type == 'blockage' else 1))
+        return self
+
+def run_summary(scenario, expected, col_names, options, quantiles=QUINTILES, **params):
+    """
+    Stats for a scenario following the request's SamplingOptions: exact, fixed-size
+    sampling or adaptive sampling (rel_tol). Returns (stats, convergence), where
+    convergence is None unless the run was adaptive.
+    """
+    if not options.exact and options.rel_tol is not None:
+        return simulator.adaptive_summary(
+            scenario, expected, col_names, quantiles,
+            rel_tol=options.rel_tol, max_simulations=options.max_simulations, seed=options.seed, **params)
+    summary = simulator.delay_summary if scenario == "delay" else simulator.blockage_summary
+    stats = summary(expected, col_names, quantiles, exact=options.exact,
+                    n_simulations=options.n_simulations, seed=options.seed, **params)
+    return stats, None
+
+def cached_response(endpoint):
+    """
+    Turns a blocking handler into an async endpoint. Repeated identical requests
+    are served from response_cache; the key is the endpoint, the validated request
+    (seed included) and the dataset version. On a miss the handler runs in
+    compute_pool. A response computed while the dataset was swapped is returned
+    but not cached, since it may come from either snapshot.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            current = dataset
+            key = (endpoint, request.model_dump_json(), current.version)
+            hit, response = response_cache.get(key)
+            if hit:
+                return response
+            try:
+                response = await compute_pool.run(handler, request)
+            except PoolSaturated:
+                raise HTTPException(status_code=429, detail="Simulation capacity exhausted, retry later.",
+                                    headers={"Retry-After": "1"})
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=504, detail=f"Request exceeded {compute_pool.timeout_seconds}s.")
+            if dataset is current:
+                response_cache.put(key, response)
+            return response
+        return wrapper
+    return decorator
+
 @app.get("/")
-def read_root():
-    return {"status": "active", "loaded_vessels": len(vessels_data), "average_distance_km": avg_distance_km}
+async def read_root():
+    current = dataset
+    return {
+        "status": "active",
+        "dataset_version": current.version,
+        "loaded_vessels": len(current.store),
+        "average_distance_km": current.avg_distance_km
+    }
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"dataset_version": dataset.version, **response_cache.stats()}
+
+@app.get("/dataset/stats")
+async def dataset_stats():
+    return {"dataset_version": dataset.version, **dataset_watcher.stats()}
+
+@app.get("/pool/stats")
+async def pool_stats():
+    return compute_pool.stats()
 
 @app.post("/simulate/delay")
+@cached_response("/simulate/delay")
 def simulate_delay(request: DelayRequest):
-    # 1. Run Simulation
-    sim_results = simulator.run_delay_simulation(
-        request.expected_delay_hours, 
+    data = dataset
+    # 1. Run Simulation (or the exact distribution) and get Quintiles
+    stats, convergence = run_summary(
+        "delay",
+        request.expected_delay_hours,
+        ["delay_hours", "total_cost"],
+        request,
         contract_penalty_per_hour=request.contract_penalty_per_hour,
-        cargo_value=avg_cargo_value,
+        cargo_value=data.avg_cargo_value,
         spoilage_rate=request.spoilage_rate_12h
     )
+    delay_quitiles = stats["delay_hours"]["quantiles"]
+    cost_quintiles = stats["total_cost"]["quantiles"]
     
-    # 2. Get Quintiles
-    delay_quitiles = simulator.get_quintiles(sim_results, "delay_hours")
-    cost_quintiles = simulator.get_quintiles(sim_results, "total_cost")
-    
-    # 3. Alternatives
+    # 2. Alternatives
     alts = router.estimate_alternative_routes(
-        avg_distance_km, 
+        data.avg_distance_km, 
         current_delay_hours=request.expected_delay_hours,
-        cargo_value=avg_cargo_value,
+        cargo_value=data.avg_cargo_value,
         spoilage_rate=request.spoilage_rate_12h
     )
     
-    # 4. New Provider
+    # 3. New Provider
     # Use average from loaded contracts if available, else default
-    new_order = router.estimate_new_order_cost(avg_cargo_value)
+    new_order = router.estimate_new_order_cost(data.avg_cargo_value)
 
-    return {
+    response = {
         "scenario": "delay",
         "input_hours": request.expected_delay_hours,
         "results": {
@@ -138,34 +317,40 @@ def simulate_delay(request: DelayRequest):
         "alternative_routes": alts,
         "new_order_option": new_order
     }
+    if convergence is not None:
+        response["results"]["convergence"] = convergence
+    return response
 
 @app.post("/simulate/blockage")
+@cached_response("/simulate/blockage")
 def simulate_blockage(request: BlockageRequest):
-    # 1. Run Simulation
-    sim_results = simulator.run_blockage_simulation(
-        request.expected_duration_half_days, 
+    data = dataset
+    # 1. Run Simulation (or the exact distribution) and get Quintiles
+    stats, convergence = run_summary(
+        "blockage",
+        request.expected_duration_half_days,
+        ["delay_days", "total_cost"],
+        request,
         contract_penalty_per_hour=request.contract_penalty_per_hour,
-        cargo_value=avg_cargo_value,
+        cargo_value=data.avg_cargo_value,
         spoilage_rate=request.spoilage_rate_12h
     )
+    duration_quintiles = stats["delay_days"]["quantiles"]
+    cost_quintiles = stats["total_cost"]["quantiles"]
     
-    # 2. Get Quintiles
-    duration_quintiles = simulator.get_quintiles(sim_results, "delay_days")
-    cost_quintiles = simulator.get_quintiles(sim_results, "total_cost")
-    
-    # 3. Alternatives
+    # 2. Alternatives
     expected_delay_hours = request.expected_duration_half_days * 12
     alts = router.estimate_alternative_routes(
-        avg_distance_km, 
+        data.avg_distance_km, 
         current_delay_hours=expected_delay_hours,
-        cargo_value=avg_cargo_value,
+        cargo_value=data.avg_cargo_value,
         spoilage_rate=request.spoilage_rate_12h
     )
     
-    # 4. New Provider
-    new_order = router.estimate_new_order_cost(avg_cargo_value)
+    # 3. New Provider
+    new_order = router.estimate_new_order_cost(data.avg_cargo_value)
 
-    return {
+    response = {
         "scenario": "blockage",
         "input_half_days": request.expected_duration_half_days,
         "results": {
@@ -175,8 +360,12 @@ def simulate_blockage(request: BlockageRequest):
         "alternative_routes": alts,
         "new_order_option": new_order
     }
+    if convergence is not None:
+        response["results"]["convergence"] = convergence
+    return response
 
 @app.post("/agent/report")
+@cached_response("/agent/report")
 def get_agent_report(request: AgentReportRequest):
     """
     Returns a consolidated, uncertainty-aware report for an agent to process.
@@ -189,31 +378,36 @@ def get_agent_report(request: AgentReportRequest):
         delay_hours = request.input_value * 12
     else:
         raise HTTPException(status_code=400, detail="Invalid scenario_type. Use 'delay' or 'blockage'.")
+    data = dataset
     
     # 2. Get Simulation Estimates (using 0 avg penalty for base simulation)
     # This gives us the variability of the delay itself
-    sim_results = simulator.run_delay_simulation(
+    # Mean, P10 and P90 of both columns in one pass
+    stats, convergence = run_summary(
+        "delay",
         delay_hours,
-        cargo_value=avg_cargo_value,
+        ["delay_hours", "total_cost"],
+        request,
+        quantiles=(0.1, 0.9),
+        cargo_value=data.avg_cargo_value,
         spoilage_rate=request.spoilage_rate_12h
     )
-    
-    # Helper to clean floats
-    def get_stats(series):
+
+    def get_stats(col_stats):
         return {
-            "expected": float(series.mean()),
-            "optimistic": float(series.quantile(0.1)), # P10
-            "pessimistic": float(series.quantile(0.9)) # P90
+            "expected": col_stats["mean"],
+            "optimistic": col_stats["quantiles"][0.1], # P10
+            "pessimistic": col_stats["quantiles"][0.9] # P90
         }
     
-    delay_stats = get_stats(sim_results["delay_hours"])
-    cost_stats = get_stats(sim_results["total_cost"])
+    delay_stats = get_stats(stats["delay_hours"])
+    cost_stats = get_stats(stats["total_cost"])
     
     # 3. Get Routing Alternatives (already has ranges)
     routes = router.estimate_alternative_routes(
-        avg_distance_km, 
+        data.avg_distance_km, 
         current_delay_hours=delay_stats["expected"],
-        cargo_value=avg_cargo_value,
+        cargo_value=data.avg_cargo_value,
         spoilage_rate=request.spoilage_rate_12h
     )
     
@@ -222,15 +416,18 @@ def get_agent_report(request: AgentReportRequest):
         "meta": {
             "scenario": request.scenario_type,
             "input_value": request.input_value,
-            "vessels_considered": len(vessels_data)
+            "vessels_considered": len(data.store)
         },
         "simulation_forecast": {
             "delay_hours": delay_stats,
             "cost_impact_usd": cost_stats,
-            "note": "Based on Monte Carlo simulation of weather/event impact."
+            "note": "Based on the exact Poisson distribution of weather/event impact." if request.exact
+                    else "Based on Monte Carlo simulation of weather/event impact."
         },
         "routing_options": {}
     }
+    if convergence is not None:
+        report["simulation_forecast"]["convergence"] = convergence
     
     for r in routes:
         key = r["route_type"].replace(" ", "_").lower().replace("&_", "").replace("(", "").replace(")", "")
@@ -242,6 +439,124 @@ def get_agent_report(request: AgentReportRequest):
         
     return report
 
+@app.post("/simulate/fleet")
+@cached_response("/simulate/fleet")
+def simulate_fleet(request: FleetRequest):
+    """
+    Runs the scenario for every loaded vessel with its own distance, cargo value and
+    late penalty in one vectorized Monte Carlo pass (independent draws per vessel).
+    Returns per-vessel quintiles and alternative routes plus the quintiles of the
+    fleet's total cost per sample (portfolio exposure).
+    """
+    if request.scenario_type not in ('delay', 'blockage'):
+        raise HTTPException(status_code=400, detail="Invalid scenario_type. Use 'delay' or 'blockage'.")
+    store = dataset.store
+    if len(store) == 0:
+        raise HTTPException(status_code=404, detail="No vessels loaded.")
+    if len(store) * request.n_simulations > MAX_FLEET_SAMPLES:
+        raise HTTPException(status_code=400, detail=f"n_simulations too large for {len(store)} vessels "
+                                                    f"(at most {MAX_FLEET_SAMPLES // len(store)}).")
+
+    # 1. Per-vessel parameters (columns of the vessel store)
+    distances_km = store.distance_km
+    cargo_values = store.cargo_value_usd
+    penalties = store.late_penalty_usd_per_hour
+
+    # 2. One batch simulation over all vessels
+    if request.scenario_type == 'delay':
+        duration_col, duration_key = "delay_hours", "delay_quintiles_hours"
+        delay_hours = request.input_value
+        run_batch = simulator.run_delay_simulation_batch
+    else:
+        duration_col, duration_key = "delay_days", "duration_quintiles_days"
+        delay_hours = request.input_value * 12
+        run_batch = simulator.run_blockage_simulation_batch
+    sim_results = run_batch(
+        request.input_value,
+        request.n_simulations,
+        contract_penalty_per_hour=penalties,
+        cargo_value=cargo_values,
+        spoilage_rate=request.spoilage_rate_12h,
+        seed=request.seed
+    )
+    stats = simulator.summarize(sim_results, [duration_col, "total_cost"])
+    fleet_stats = simulator.summarize({"total_cost": sim_results["total_cost"].sum(axis=0)}, ["total_cost"])
+
+    # 3. Alternative routes for all vessels in one broadcasted pass (modes x vessels x scenarios)
+    routes = router.estimate_alternative_routes_array(
+        distances_km,
+        current_delay_hours=delay_hours,
+        cargo_value=cargo_values,
+        spoilage_rate=request.spoilage_rate_12h
+    )
+
+    # 4. Per-vessel response
+    per_vessel = []
+    for i in range(len(store)):
+        record = store.record(i)
+        per_vessel.append({
+            "contract_id": record["contract_id"],
+            "vessel_name": record["vessel_name"],
+            "distance_km": float(distances_km[i]),
+            "cargo_value_usd": float(cargo_values[i]),
+            "late_penalty_usd_per_hour": float(penalties[i]),
+            duration_key: {q: v[i] for q, v in stats[duration_col]["quantiles"].items()},
+            "expected_cost_usd": stats["total_cost"]["mean"][i],
+            "cost_quintiles_usd": {q: v[i] for q, v in stats["total_cost"]["quantiles"].items()},
+            "alternative_routes": router.route_options(routes[:, i])
+        })
+
+    return {
+        "meta": {
+            "scenario": request.scenario_type,
+            "input_value": request.input_value,
+            "vessels_considered": len(store),
+            "n_simulations": request.n_simulations,
+            "dataset_version": store.version
+        },
+        "aggregate": {
+            "expected_total_cost_usd": fleet_stats["total_cost"]["mean"],
+            "total_cost_quintiles_usd": fleet_stats["total_cost"]["quantiles"]
+        },
+        "vessels": per_vessel
+    }
+
+# Vessel queries (served from the columnar store, no simulation)
+@app.get("/vessels/bbox")
+async def vessels_in_bbox(min_lon: float, min_lat: float, max_lon: float, max_lat: float):
+    store = dataset.store
+    rows = store.in_bbox(min_lon, min_lat, max_lon, max_lat)
+    return {"dataset_version": store.version, "count": len(rows), "vessels": [store.record(i) for i in rows]}
+
+@app.get("/vessels/top")
+async def vessels_top_exposure(n: int = 10, delay_hours: float = 24, spoilage_rate_12h: float = 0.30):
+    """Vessels ranked by the penalty plus spoilage cost a delay of delay_hours would cause."""
+    if n < 1 or delay_hours < 0 or spoilage_rate_12h < 0:
+        raise HTTPException(status_code=400, detail="n must be positive; delay_hours and spoilage_rate_12h non-negative.")
+    store = dataset.store
+    rows, exposures = store.top_by_exposure(n, delay_hours, spoilage_rate_12h)
+    return {
+        "dataset_version": store.version,
+        "delay_hours": delay_hours,
+        "vessels": [{**store.record(i), "exposure_usd": exposure} for i, exposure in zip(rows, exposures)]
+    }
+
+@app.get("/vessels/by-name/{vessel_name}")
+async def vessels_by_name(vessel_name: str):
+    store = dataset.store
+    rows = store.by_vessel_name(vessel_name)
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"No vessel named {vessel_name}.")
+    return {"dataset_version": store.version, "vessels": [store.record(i) for i in rows]}
+
+@app.get("/vessels/{contract_id}")
+async def vessel_by_contract(contract_id: str):
+    store = dataset.store
+    row = store.by_contract_id(contract_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Unknown contract_id {contract_id}.")
+    return store.record(row)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool already holds max_pending tasks."""
+
+
+class ComputePool:
+    """
+    Bounded thread pool for blocking simulation/routing work called from async
+    handlers, so the event loop stays free while NumPy runs.
+
+    At most max_pending tasks are admitted (running plus queued). Further submissions
+    fail immediately with PoolSaturated instead of queueing without limit. Callers
+    wait at most timeout_seconds for a result. A task that times out keeps its slot
+    until it actually finishes, so slow runs still count against the limit.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, timeout_seconds=30):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.max_workers
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="compute")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _release(self, _future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, fn, *args):
+        """
+        Runs fn(*args) in the pool and returns its result.
+
+        Raises:
+            PoolSaturated: max_pending tasks are already admitted.
+            asyncio.TimeoutError: No result within timeout_seconds.
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated()
+            self.pending += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "timeout_seconds": self.timeout_seconds,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out
+            }
@@ -0,0 +1,78 @@
+import os
+import threading
+
+
+class DatasetWatcher:
+    """
+    Polls a file's mtime and size on a background thread and reloads it when they
+    change.
+
+    loader(path) parses the file and builds whatever the caller serves from it; it
+    runs on the watcher thread, never on the request path. Its result is handed to
+    on_load, which swaps it in. When the file is missing or loader raises (e.g. a
+    snapshot that is still being written), the current data stays in place and the
+    next change is picked up as usual.
+    """
+
+    def __init__(self, path, loader, on_load, interval_seconds=5.0):
+        self.path = path
+        self.loader = loader
+        self.on_load = on_load
+        self.interval_seconds = interval_seconds
+        self._signature = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def poll(self):
+        """Reloads if the file changed since the last poll. Returns True when it did."""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        try:
+            data = self.loader(self.path)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"Warning: reloading {self.path} failed ({self.last_error}), keeping current data.")
+            return False
+        self.on_load(data)
+        self.reloads += 1
+        self.last_error = None
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.poll()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="dataset-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "interval_seconds": self.interval_seconds,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
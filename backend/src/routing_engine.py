@@ -1,118 +1,161 @@
+import json
+import os
+import numpy as np
+
+# Last axis of the array results
+ROUTE_SCENARIOS = ("optimistic", "expected", "pessimistic")
+
+ROUTE_DTYPE = np.dtype([("time_hours", float), ("cost_usd", float), ("feasible", bool)])
+
+DEFAULT_MODES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transport_modes.json")
+
+
+def load_transport_modes(path=DEFAULT_MODES_PATH):
+    """
+    Reads and validates a transport mode registry.
+
+    Each mode needs key, route_type, description, speed_kmh, cost_per_km and
+    multipliers (optimistic / expected / pessimistic). Optional: handling_hours and
+    fixed_cost_usd (e.g. transshipment of multimodal routes), waits_for_delay (the
+    mode continues the current voyage, so it waits out the delay) and constraints
+    (min_distance_km / max_distance_km). baseline_mode is the normal voyage that
+    spoilage is measured against.
+
+    Returns:
+        (baseline_mode, list of mode dicts with the optional fields filled in)
+
+    Raises:
+        ValueError: A mode is missing a field or has an invalid value.
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    modes = []
+    for mode in config.get("modes", []):
+        missing = [k for k in ("key", "route_type", "description", "speed_kmh", "cost_per_km", "multipliers") if k not in mode]
+        if missing:
+            raise ValueError(f"Transport mode {mode.get('key', '?')} is missing {', '.join(missing)}")
+        if mode["speed_kmh"] <= 0:
+            raise ValueError(f"Transport mode {mode['key']}: speed_kmh must be positive")
+        if mode["cost_per_km"] < 0 or mode.get("handling_hours", 0) < 0 or mode.get("fixed_cost_usd", 0) < 0:
+            raise ValueError(f"Transport mode {mode['key']}: costs and handling time must be non-negative")
+        if any(s not in mode["multipliers"] for s in ROUTE_SCENARIOS):
+            raise ValueError(f"Transport mode {mode['key']}: multipliers need {', '.join(ROUTE_SCENARIOS)}")
+        constraints = mode.get("constraints", {})
+        modes.append({
+            **mode,
+            "handling_hours": mode.get("handling_hours", 0.0),
+            "fixed_cost_usd": mode.get("fixed_cost_usd", 0.0),
+            "waits_for_delay": mode.get("waits_for_delay", False),
+            "constraints": {
+                "min_distance_km": constraints.get("min_distance_km", 0.0),
+                "max_distance_km": constraints.get("max_distance_km", float("inf"))
+            }
+        })
+
+    keys = [m["key"] for m in modes]
+    if not modes or len(set(keys)) != len(keys):
+        raise ValueError("Transport mode registry needs at least one mode and unique keys")
+    baseline_mode = config.get("baseline_mode", keys[0])
+    if baseline_mode not in keys:
+        raise ValueError(f"Unknown baseline_mode {baseline_mode}")
+    return baseline_mode, modes
+
+
 class RoutingEngine:
-    def __init__(self):
-        # Base costs per km or per unit (mock values)
-        self.costs = {
-            "sea": 0.10, # $ per km per unit
-            "land_truck": 0.50,
-            "land_train": 0.30,
-            "air": 2.50 # If we ever needed it
-        }
-        self.speeds = {
-            "sea": 30, # km/h (approx 16 knots)
-            "land_truck": 60, # km/h
-            "land_train": 50  # km/h
-        }
+    def __init__(self, modes_path=DEFAULT_MODES_PATH):
+        # Transport modes come from the registry (speed, cost, uncertainty, constraints);
+        # adding a mode is a config change, evaluation is the same kernel for all of them
+        baseline_mode, registry = load_transport_modes(modes_path)
+        self.registry = {m["key"]: m for m in registry}
+        # Evaluated modes, in the order of the first axis of the array results
+        self.modes = tuple(self.registry)
+        self.costs = {k: m["cost_per_km"] for k, m in self.registry.items()} # $ per km per unit
+        self.speeds = {k: m["speed_kmh"] for k, m in self.registry.items()} # km/h
+        self.baseline_speed = float(self.speeds[baseline_mode])
+
+        # Kernel parameters, one row per mode
+        self._speeds = np.array([m["speed_kmh"] for m in registry], dtype=float)
+        self._costs = np.array([m["cost_per_km"] for m in registry], dtype=float)
+        self._handling_hours = np.array([m["handling_hours"] for m in registry], dtype=float)
+        self._fixed_costs = np.array([m["fixed_cost_usd"] for m in registry], dtype=float)
+        self._waits = np.array([m["waits_for_delay"] for m in registry], dtype=float)
+        self._multipliers = np.array([[m["multipliers"][s] for s in ROUTE_SCENARIOS] for m in registry], dtype=float)
+        self._min_distance = np.array([m["constraints"]["min_distance_km"] for m in registry], dtype=float)
+        self._max_distance = np.array([m["constraints"]["max_distance_km"] for m in registry], dtype=float)
+
+    def estimate_alternative_routes_array(self, distance_km, current_delay_hours=0, cargo_value=0, spoilage_rate=0.3):
+        """
+        Time and cost of every mode for arrays of inputs in one broadcasted pass.
+
+        Args:
+            distance_km: Distances (any shape; broadcast against the other inputs).
+            current_delay_hours: Current delays (added to the modes that wait it out).
+            cargo_value: Cargo values for the spoilage cost.
+            spoilage_rate: Spoilage rates per 12h.
+
+        Returns:
+            Structured array (fields time_hours, cost_usd and feasible) of shape
+            (len(self.modes), *broadcast_shape, 3); the last axis follows ROUTE_SCENARIOS.
+            E.g. distances[:, None] and delays[None, :] give a sensitivity grid.
+        """
+        distance_km, delay, value, rate = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (distance_km, current_delay_hours, cargo_value, spoilage_rate)))
+        # Mode parameters, shaped (modes, 1, ..., 1) to broadcast over the inputs
+        param_shape = (len(self.modes),) + (1,) * distance_km.ndim
+        speeds, costs, handling, fixed, waits, min_distance, max_distance = (
+            a.reshape(param_shape) for a in (self._speeds, self._costs, self._handling_hours, self._fixed_costs,
+                                              self._waits, self._min_distance, self._max_distance))
+        multipliers = self._multipliers.reshape(param_shape + (3,))
+
+        # 1. Travel time per mode and scenario (modes that continue the voyage wait out the delay)
+        times = np.maximum(0.0, (distance_km / speeds + handling)[..., None] * multipliers
+                           + waits[..., None] * delay[..., None])
+
+        # 2. Spoilage on the time above the normal (baseline) voyage
+        # Loss = Value * (1 - (1-rate)^half_days)
+        normal_time = distance_km / self.baseline_speed
+        excess_half_days = np.maximum(0.0, times - normal_time[..., None]) / 12.0
+        with np.errstate(invalid="ignore"):
+            spoilage = np.where(excess_half_days > 0,
+                                value[..., None] * (1 - np.power(1 - rate[..., None], excess_half_days)), 0.0)
+
+        # 3. Transport cost under the same uncertainty plus spoilage, and feasibility
+        result = np.empty(times.shape, dtype=ROUTE_DTYPE)
+        result["time_hours"] = times
+        result["cost_usd"] = np.maximum(0.0, (distance_km * costs + fixed)[..., None] * multipliers + spoilage)
+        result["feasible"] = ((distance_km >= min_distance) & (distance_km <= max_distance))[..., None]
+        return result
+
+    def route_options(self, routes):
+        """
+        Converts one (modes, 3) slice of estimate_alternative_routes_array into the
+        list of option dicts returned by estimate_alternative_routes. Infeasible modes
+        are left out.
+        """
+        def ranges(values):
+            optimistic, expected, pessimistic = values.tolist()
+            return {"expected": expected, "optimistic": optimistic, "pessimistic": pessimistic}
+
+        options = []
+        for mode, mode_routes in zip(self.modes, routes):
+            if not mode_routes["feasible"].all():
+                continue
+            options.append({
+                "route_type": self.registry[mode]["route_type"],
+                "time_hours": ranges(mode_routes["time_hours"]),
+                "cost_usd": ranges(mode_routes["cost_usd"]),
+                "description": self.registry[mode]["description"]
+            })
+        return options
 
     def estimate_alternative_routes(self, distance_km, current_delay_hours=0, cargo_value=0, spoilage_rate=0.3):
         """
         Returns a list of alternative route options with time and cost estimates,
         including uncertainty ranges and spoilage costs.
         """
-        options = []
-        
-        # Helper for non-negative
-        def clamp(val):
-            return max(0.0, float(val))
-            
-        # Helper for Spoilage
-        # We assume baseline time is the normal sea time without delay.
-        # Any time ABOVE baseline incurs spoilage.
-        normal_sea_time = distance_km / self.speeds["sea"]
-        
-        def calc_spoilage(total_time_hours):
-            # Excess time
-            excess_hours = max(0, total_time_hours - normal_sea_time)
-            excess_half_days = excess_hours / 12.0
-            if excess_half_days <= 0:
-                return 0.0
-            
-            # Loss = Value * (1 - (1-rate)^half_days)
-            remaining_ratio = pow(1 - spoilage_rate, excess_half_days)
-            return cargo_value * (1 - remaining_ratio)
-
-        # --- Option 1: Wait & Sea ---
-        sea_time = distance_km / self.speeds["sea"]
-        sea_cost = distance_km * self.costs["sea"]
-        
-        # Uncertainty
-        time_exp = clamp(sea_time + current_delay_hours)
-        time_opt = clamp((sea_time * 0.95) + current_delay_hours)
-        time_pess = clamp((sea_time * 1.15) + current_delay_hours)
-        
-        options.append({
-            "route_type": "Wait & Sea",
-            "time_hours": {
-                "expected": time_exp,
-                "optimistic": time_opt,
-                "pessimistic": time_pess
-            },
-            "cost_usd": {
-                "expected": clamp(sea_cost + calc_spoilage(time_exp)),
-                "optimistic": clamp((sea_cost * 0.95) + calc_spoilage(time_opt)),
-                "pessimistic": clamp((sea_cost * 1.15) + calc_spoilage(time_pess))
-            },
-            "description": "Wait out the disruption and continue by sea."
-        })
-        
-        # --- Option 2: Land (Truck) ---
-        truck_time = distance_km / self.speeds["land_truck"]
-        truck_cost = distance_km * self.costs["land_truck"]
-        
-        # Uncertainty
-        time_exp = clamp(truck_time)
-        time_opt = clamp(truck_time * 0.90)
-        time_pess = clamp(truck_time * 1.25)
-        
-        options.append({
-            "route_type": "Land (Truck)",
-            "time_hours": {
-                "expected": time_exp,
-                "optimistic": time_opt,
-                "pessimistic": time_pess
-            },
-            "cost_usd": {
-                "expected": clamp(truck_cost + calc_spoilage(time_exp)),
-                "optimistic": clamp((truck_cost * 0.90) + calc_spoilage(time_opt)),
-                "pessimistic": clamp((truck_cost * 1.25) + calc_spoilage(time_pess))
-            },
-            "description": "Offload and transport by truck."
-        })
-        
-        # --- Option 3: Land (Train) ---
-        train_time = distance_km / self.speeds["land_train"]
-        train_cost = distance_km * self.costs["land_train"]
-        
-        # Uncertainty
-        time_exp = clamp(train_time)
-        time_opt = clamp(train_time * 0.95)
-        time_pess = clamp(train_time * 1.10)
-        
-        options.append({
-            "route_type": "Land (Train)",
-            "time_hours": {
-                "expected": time_exp,
-                "optimistic": time_opt,
-                "pessimistic": time_pess
-            },
-            "cost_usd": {
-                "expected": clamp(train_cost + calc_spoilage(time_exp)),
-                "optimistic": clamp((train_cost * 0.95) + calc_spoilage(time_opt)),
-                "pessimistic": clamp((train_cost * 1.10) + calc_spoilage(time_pess))
-            },
-            "description": "Offload and transport by rail."
-        })
-         
-        return options
+        return self.route_options(
+            self.estimate_alternative_routes_array(distance_km, current_delay_hours, cargo_value, spoilage_rate))
 
     def estimate_new_order_cost(self, product_value):
         """
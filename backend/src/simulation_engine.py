@@ -1,84 +1,430 @@
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+
 import numpy as np
-import pandas as pd
+
+QUINTILES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+# Samples drawn per child stream. Fixed (not per worker) so that a seeded run gives
+# the same result whatever the thread count.
+STREAM_CHUNK_SAMPLES = 200_000
+# Adaptive sampling: samples drawn before convergence is first tested
+ADAPTIVE_MIN_SAMPLES = 2000
+# Equally likely standard normal values (midpoint quantiles), for the spread of the
+# rank a sample quantile lands on
+RANK_Z = np.array([NormalDist().inv_cdf((i + 0.5) / 32) for i in range(32)])
+
+
+class SimulationResult:
+    """
+    Monte Carlo samples by column, kept as NumPy arrays: 1D (n_simulations) for a
+    single scenario, 2D (n_scenarios, n_simulations) for batches. Columns are read
+    like the DataFrame this replaces, e.g. result["total_cost"].
+    """
+    __slots__ = ("columns",)
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __getitem__(self, col_name):
+        return self.columns[col_name]
+
+    def __contains__(self, col_name):
+        return col_name in self.columns
+
+    def __len__(self):
+        return next(iter(self.columns.values())).shape[-1]
+
+    def keys(self):
+        return self.columns.keys()
+
+    def row(self, i):
+        """Single-scenario result for row i of a batch."""
+        return SimulationResult({col: values[i] for col, values in self.columns.items()})
+
 
 class MonteCarloSimulator:
-    def __init__(self, base_hourly_cost=500):
+    def __init__(self, base_hourly_cost=500, seed=None, n_workers=None):
+        """
+        Args:
+            base_hourly_cost (float): Operational cost per hour of delay.
+            seed (int): Seed of the simulator's own Generator (None: OS entropy).
+            n_workers (int): Threads used to draw large runs (default: CPU count).
+        """
         self.base_hourly_cost = base_hourly_cost
+        self.rng = np.random.default_rng(seed)
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _streams(self, n, seed=None):
+        """
+        n independent child Generators (SeedSequence spawning). With a request seed
+        they are spawned from a Generator seeded with it, so the run can be replayed;
+        otherwise from the simulator's own Generator (under a lock, so concurrent
+        requests never share a stream).
+        """
+        if seed is not None:
+            return np.random.default_rng(seed).spawn(n)
+        with self._lock:
+            return self.rng.spawn(n)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.n_workers, thread_name_prefix="montecarlo")
+            return self._pool
+
+    def _poisson(self, lam, n_simulations, seed=None):
+        """
+        Poisson samples of shape (n_scenarios, n_simulations) for means lam (column
+        vector). Samples are drawn in column blocks of about STREAM_CHUNK_SAMPLES, each
+        from its own child stream; blocks run in the thread pool when there is more
+        than one.
+        """
+        n_scenarios = lam.shape[0]
+        block = max(1, STREAM_CHUNK_SAMPLES // max(n_scenarios, 1))
+        starts = range(0, n_simulations, block)
+        streams = self._streams(max(len(starts), 1), seed)
+        if len(starts) <= 1:
+            return streams[0].poisson(lam, (n_scenarios, n_simulations))
+
+        samples = np.empty((n_scenarios, n_simulations), dtype=np.int64)
+
+        def draw(i):
+            start = starts[i]
+            stop = min(start + block, n_simulations)
+            samples[:, start:stop] = streams[i].poisson(lam, (n_scenarios, stop - start))
+
+        if self.n_workers > 1:
+            list(self._executor().map(draw, range(len(starts))))
+        else:
+            for i in range(len(starts)):
+                draw(i)
+        return samples
+
+    def _scenario_arrays(self, *params):
+        """Broadcasts scenario parameters to 1D arrays of equal length, as column vectors."""
+        arrays = np.broadcast_arrays(*(np.atleast_1d(np.asarray(p, dtype=float)) for p in params))
+        if arrays[0].ndim != 1:
+            raise ValueError("Scenario parameters must be scalars or 1D arrays")
+        return [a[:, np.newaxis] for a in arrays]
+
+    def _costs(self, hours_delayed, half_days, contract_penalty_per_hour, cargo_value, spoilage_rate):
+        # Base Costs (Operational + Contract Penalty)
+        operational_costs = hours_delayed * (self.base_hourly_cost + contract_penalty_per_hour)
+
+        # Spoilage: Remaining Value = Original * (1 - rate) ^ half_days
+        # Lost Value = Original - Remaining (0 when there is no delay)
+        remaining_ratio = np.power(1 - spoilage_rate, half_days)
+        spoilage_costs = cargo_value * (1 - remaining_ratio)
+
+        return operational_costs, spoilage_costs, operational_costs + spoilage_costs
+
+    def run_delay_simulation_batch(self, expected_delay_hours, n_simulations=1000, contract_penalty_per_hour=0, cargo_value=0, spoilage_rate=0.3, seed=None):
+        """
+        Simulates delays for many scenarios at once (e.g. every vessel in the fleet or a
+        sensitivity grid) with a single Poisson draw.
+
+        Args:
+            expected_delay_hours (float or array): Poisson mean per scenario.
+            n_simulations (int): Monte Carlo iterations per scenario.
+            contract_penalty_per_hour (float or array): Penalty per hour per scenario.
+            cargo_value (float or array): Cargo value per scenario.
+            spoilage_rate (float or array): Rate of value loss per 12 hours per scenario.
+            seed (int): Optional seed making the run reproducible (see _streams).
+
+        Scalars and arrays are broadcast against each other to n_scenarios.
+
+        Returns:
+            SimulationResult: 'delay_hours', 'operational_cost', 'spoilage_cost' and
+            'total_cost', each an array of shape (n_scenarios, n_simulations).
+        """
+        lam, penalty, value, rate = self._scenario_arrays(
+            expected_delay_hours, contract_penalty_per_hour, cargo_value, spoilage_rate)
+        delays = self._poisson(lam, n_simulations, seed)
+
+        operational_costs, spoilage_costs, total_costs = self._costs(delays, delays / 12.0, penalty, value, rate)
+        return SimulationResult({
+            "delay_hours": delays,
+            "operational_cost": operational_costs,
+            "spoilage_cost": spoilage_costs,
+            "total_cost": total_costs
+        })
+
+    def run_blockage_simulation_batch(self, expected_half_days, n_simulations=1000, contract_penalty_per_hour=0, cargo_value=0, spoilage_rate=0.3, seed=None):
+        """
+        Simulates blockage durations (in half-days) for many scenarios at once with a
+        single Poisson draw.
+
+        Args:
+            expected_half_days (float or array): Mean number of half-days per scenario.
+            n_simulations (int): Monte Carlo iterations per scenario.
+            contract_penalty_per_hour (float or array): Penalty per hour per scenario.
+            cargo_value (float or array): Cargo value per scenario.
+            spoilage_rate (float or array): Rate of value loss per 12 hours per scenario.
+
+        Returns:
+            SimulationResult: 'delay_days', 'operational_cost', 'spoilage_cost' and
+            'total_cost', each an array of shape (n_scenarios, n_simulations).
+        """
+        lam, penalty, value, rate = self._scenario_arrays(
+            expected_half_days, contract_penalty_per_hour, cargo_value, spoilage_rate)
+        half_days = self._poisson(lam, n_simulations, seed)
+
+        operational_costs, spoilage_costs, total_costs = self._costs(half_days * 12, half_days, penalty, value, rate)
+        return SimulationResult({
+            "delay_days": half_days / 2.0,
+            "operational_cost": operational_costs,
+            "spoilage_cost": spoilage_costs,
+            "total_cost": total_costs
+        })
 
-    def run_delay_simulation(self, expected_delay_hours, n_simulations=1000, contract_penalty_per_hour=0, cargo_value=0, spoilage_rate=0.3):
+    def run_delay_simulation(self, expected_delay_hours, n_simulations=1000, contract_penalty_per_hour=0, cargo_value=0, spoilage_rate=0.3, seed=None):
         """
         Simulates delays using a Poisson distribution.
-        
+
         Args:
             expected_delay_hours (float): The mean of the Poisson distribution.
             n_simulations (int): Number of Monte Carlo iterations.
             contract_penalty_per_hour (float): Additional cost per hour due to contract penalties.
             cargo_value (float): Total value of cargo potentially spoiling.
             spoilage_rate (float): Rate of value loss per 12 hours (half-day).
-            
+            seed (int): Optional seed for a reproducible run.
+
         Returns:
-            pd.DataFrame: Simulation results with 'delay_hours' and 'total_cost'.
+            SimulationResult: 1D arrays 'delay_hours', 'operational_cost', 'spoilage_cost' and 'total_cost'.
         """
-        # Sample from Poisson distribution
-        delays = np.random.poisson(expected_delay_hours, n_simulations)
-        
-        # Base Costs (Operational + Contract Penalty)
-        operational_costs = delays * (self.base_hourly_cost + contract_penalty_per_hour)
-        
-        # Spoilage Calculation
-        # Rate is per 12 hours.
-        delay_half_days = delays / 12.0
-        # Exponential decay: Remaining Value = Original * (1 - rate) ^ half_days
-        # Lost Value = Original - Remaining
-        # If delays are 0, lost value is 0.
-        remaining_ratio = np.power(1 - spoilage_rate, delay_half_days)
-        spoilage_costs = cargo_value * (1 - remaining_ratio)
-        
-        total_costs = operational_costs + spoilage_costs
-        
-        return pd.DataFrame({
-            "delay_hours": delays,
-            "operational_cost": operational_costs,
-            "spoilage_cost": spoilage_costs,
-            "total_cost": total_costs
-        })
+        return self.run_delay_simulation_batch(
+            expected_delay_hours, n_simulations, contract_penalty_per_hour, cargo_value, spoilage_rate, seed).row(0)
 
-    def run_blockage_simulation(self, expected_half_days, n_simulations=1000, contract_penalty_per_hour=0, cargo_value=0, spoilage_rate=0.3):
+    def run_blockage_simulation(self, expected_half_days, n_simulations=1000, contract_penalty_per_hour=0, cargo_value=0, spoilage_rate=0.3, seed=None):
         """
         Simulates blockage duration in half-days using a Poisson distribution.
-        
+
         Args:
             expected_half_days (float): Mean number of half-days (12-hour block).
             n_simulations (int): Number of iterations.
             contract_penalty_per_hour (float): Penalty per hour.
             cargo_value (float): Total value of cargo.
             spoilage_rate (float): Rate of value loss per 12 hours.
-        
+            seed (int): Optional seed for a reproducible run.
+
         Returns:
-            pd.DataFrame: Results with 'delay_days', 'total_cost'.
-        """
-        # Sample half-days
-        half_days = np.random.poisson(expected_half_days, n_simulations)
-        
-        # Convert to hours for cost calculation
-        hours_delayed = half_days * 12
-        
-        # Base Costs
-        operational_costs = hours_delayed * (self.base_hourly_cost + contract_penalty_per_hour)
-        
-        # Spoilage
-        remaining_ratio = np.power(1 - spoilage_rate, half_days)
-        spoilage_costs = cargo_value * (1 - remaining_ratio)
-        
-        total_costs = operational_costs + spoilage_costs
-        
-        return pd.DataFrame({
-            "delay_days": half_days / 2.0,
-            "operational_cost": operational_costs,
-            "spoilage_cost": spoilage_costs,
-            "total_cost": total_costs
-        })
+            SimulationResult: 1D arrays 'delay_days', 'operational_cost', 'spoilage_cost' and 'total_cost'.
+        """
+        return self.run_blockage_simulation_batch(
+            expected_half_days, n_simulations, contract_penalty_per_hour, cargo_value, spoilage_rate, seed).row(0)
+
+    def summarize(self, results, col_names, quantiles=QUINTILES):
+        """
+        Mean and quantiles of several result columns at once: the columns are stacked
+        and reduced with one np.quantile call (linear interpolation, as pandas).
+
+        Returns:
+            dict: {col_name: {"mean": value, "quantiles": {q: value}}}. Values are
+            floats for a single scenario and per-scenario lists for batch results.
+        """
+        stacked = np.stack([np.asarray(results[col], dtype=float) for col in col_names])
+        values = np.quantile(stacked, quantiles, axis=-1)
+        means = stacked.mean(axis=-1)
+        return {
+            col: {
+                "mean": means[i].tolist(),
+                "quantiles": {q: values[j, i].tolist() for j, q in enumerate(quantiles)}
+            }
+            for i, col in enumerate(col_names)
+        }
+
+    def _poisson_ppf(self, lam, probs):
+        """
+        Smallest k with P(K <= k) >= p for K ~ Poisson(lam), by inverting the CDF on
+        a window of 12 standard deviations around each mean. The mass below the
+        window is negligible, so time and memory grow with sqrt(lam), not lam.
+
+        Args:
+            lam (array): Poisson means, shape (n_scenarios, 1).
+            probs (array): Probabilities, shape (n_probs,).
+
+        Returns:
+            np.ndarray: Quantiles of shape (n_scenarios, n_probs).
+        """
+        spread = 12 * np.sqrt(lam)
+        lo = np.floor(np.maximum(0.0, lam - spread))
+        width = int((np.ceil(lam + spread + 12) - lo).max()) + 1
+        k = lo + np.arange(width, dtype=float)
+        # log P(K = lo) from lgamma, then log P(K = k + 1) = log P(K = k) + log(lam / (k + 1))
+        log_factorial_lo = np.array([math.lgamma(x + 1) for x in lo[:, 0].tolist()])[:, np.newaxis]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            steps = np.log(lam) - np.log(k[:, 1:])
+            log_pmf = lo * np.log(lam) - lam - log_factorial_lo + np.concatenate(
+                [np.zeros_like(lo), np.cumsum(steps, axis=1)], axis=1)
+        pmf = np.where(lam > 0, np.exp(log_pmf), k == 0)
+        cdf = np.cumsum(pmf, axis=1)
+        return lo + (cdf[:, :, np.newaxis] < probs).sum(axis=1)
+
+    def _exact_summary(self, scenario, expected, col_names, quantiles, n_simulations, contract_penalty_per_hour, cargo_value, spoilage_rate):
+        """
+        Summary in the format of summarize(), computed from the Poisson distribution
+        instead of samples. Every cost is a non-decreasing function of the Poisson
+        count, so its quantiles are the costs at the count's quantiles. The means use
+        E[s^K] = exp(lam * (s - 1)).
+
+        The 0 and 1 quantiles of a Poisson are 0 and unbounded. Like the extremes of
+        a sampling run, they are taken at 1 / (n + 1) and n / (n + 1) with
+        n = n_simulations.
+        """
+        lam, penalty, value, rate = self._scenario_arrays(expected, contract_penalty_per_hour, cargo_value, spoilage_rate)
+        probs = np.clip(np.asarray(quantiles, dtype=float), 1 / (n_simulations + 1), n_simulations / (n_simulations + 1))
+        counts = self._poisson_ppf(lam, probs)
+
+        # Per unit of the Poisson count: hours delayed, half-days of spoilage
+        hours_per_count, half_days_per_count = (1.0, 1 / 12.0) if scenario == "delay" else (12.0, 1.0)
+        operational_q, spoilage_q, total_q = self._costs(
+            counts * hours_per_count, counts * half_days_per_count, penalty, value, rate)
+        operational_mean = lam[:, 0] * hours_per_count * (self.base_hourly_cost + penalty[:, 0])
+        spoilage_mean = value[:, 0] * (1 - np.exp(lam[:, 0] * (np.power(1 - rate[:, 0], half_days_per_count) - 1)))
+        columns = {
+            "delay_hours": (counts, lam[:, 0]),
+            "delay_days": (counts / 2.0, lam[:, 0] / 2.0),
+            "operational_cost": (operational_q, operational_mean),
+            "spoilage_cost": (spoilage_q, spoilage_mean),
+            "total_cost": (total_q, operational_mean + spoilage_mean)
+        }
+        single = all(np.ndim(p) == 0 for p in (expected, contract_penalty_per_hour, cargo_value, spoilage_rate))
+        summary = {}
+        for col in col_names:
+            values, mean = columns[col]
+            if single:
+                values, mean = values[0], mean[0]
+            summary[col] = {
+                "mean": mean.tolist(),
+                "quantiles": {q: values[..., j].tolist() for j, q in enumerate(quantiles)}
+            }
+        return summary
+
+    def delay_summary(self, expected_delay_hours, col_names, quantiles=QUINTILES, exact=False, n_simulations=1000, contract_penalty_per_hour=0, cargo_value=0, spoilage_rate=0.3, seed=None):
+        """
+        Mean and quantiles of delay-scenario columns, in the format of summarize().
+
+        Args:
+            exact (bool): Compute them from the Poisson CDF (deterministic, no
+                sampling) instead of a Monte Carlo run. The sampling path stays the
+                reference for validating the exact one.
+
+        Other arguments as in run_delay_simulation_batch. Scalars give floats; arrays
+        give per-scenario lists.
+        """
+        params = (expected_delay_hours, contract_penalty_per_hour, cargo_value, spoilage_rate)
+        if exact:
+            return self._exact_summary("delay", expected_delay_hours, col_names, quantiles, n_simulations,
+                                       contract_penalty_per_hour, cargo_value, spoilage_rate)
+        results = self.run_delay_simulation_batch(expected_delay_hours, n_simulations, contract_penalty_per_hour, cargo_value, spoilage_rate, seed)
+        if all(np.ndim(p) == 0 for p in params):
+            results = results.row(0)
+        return self.summarize(results, col_names, quantiles)
+
+    def blockage_summary(self, expected_half_days, col_names, quantiles=QUINTILES, exact=False, n_simulations=1000, contract_penalty_per_hour=0, cargo_value=0, spoilage_rate=0.3, seed=None):
+        """Like delay_summary, for blockage scenarios (see run_blockage_simulation_batch)."""
+        params = (expected_half_days, contract_penalty_per_hour, cargo_value, spoilage_rate)
+        if exact:
+            return self._exact_summary("blockage", expected_half_days, col_names, quantiles, n_simulations,
+                                       contract_penalty_per_hour, cargo_value, spoilage_rate)
+        results = self.run_blockage_simulation_batch(expected_half_days, n_simulations, contract_penalty_per_hour, cargo_value, spoilage_rate, seed)
+        if all(np.ndim(p) == 0 for p in params):
+            results = results.row(0)
+        return self.summarize(results, col_names, quantiles)
+
+    def adaptive_summary(self, scenario, expected, col_names, quantiles=QUINTILES, rel_tol=0.01, max_simulations=1_000_000, contract_penalty_per_hour=0, cargo_value=0, spoilage_rate=0.3, seed=None):
+        """
+        Single-scenario summary (format of summarize()) from a sampling run that stops
+        as soon as it is precise enough.
+
+        Standard errors come from all samples drawn so far: std / sqrt(n) for the
+        mean. For a quantile q, the fraction of samples below the true quantile is
+        approximately N(q, q(1-q)/n) (binomial), so the SE is the standard deviation
+        of the sample quantiles at q + z * sqrt(q(1-q)/n) over standard normal z
+        (RANK_Z). This also holds on the discrete delay distribution: a quantile
+        inside a mass point (e.g. 0 for a small mean) has an SE of 0, one near the
+        boundary of two mass points the spread of flipping between them. Sampling stops once the SE of every column's mean and
+        interior quantiles (the 0/1 extremes only grow with n) is at most
+        rel_tol * |column mean|, or at max_simulations. The first round draws
+        ADAPTIVE_MIN_SAMPLES; each further round draws the number of samples the
+        current SEs suggest are still missing, at most doubling the run.
+
+        Args:
+            scenario (str): 'delay' or 'blockage'.
+            rel_tol (float): Target standard error relative to the column mean.
+            max_simulations (int): Upper bound on the number of samples (never exceeded).
+
+        Other arguments as in run_delay_simulation / run_blockage_simulation.
+
+        Returns:
+            tuple: (summary, convergence). convergence holds 'n_simulations',
+            'rel_tol', 'converged' and 'standard_errors' ({col_name: {"mean": se,
+            "quantiles": {q: se}}}), plus a 'warning' when max_simulations was
+            reached first.
+        """
+        run_batch = self.run_delay_simulation_batch if scenario == "delay" else self.run_blockage_simulation_batch
+        interior = [j for j, q in enumerate(quantiles) if 0 < q < 1]
+        probs = np.asarray(quantiles, dtype=float)
+        columns = {col: [] for col in col_names}
+        n = 0
+        n_new = min(ADAPTIVE_MIN_SAMPLES, max_simulations)
+        while True:
+            # Seeded runs give every round its own reproducible stream
+            round_seed = None if seed is None else [seed, n]
+            results = run_batch(expected, n_new, contract_penalty_per_hour, cargo_value,
+                                spoilage_rate, round_seed).row(0)
+            for col in col_names:
+                columns[col].append(results[col])
+            n += n_new
+
+            stacked = np.stack([np.concatenate(columns[col]).astype(float) for col in col_names])
+            means = stacked.mean(axis=1)
+            mean_se = stacked.std(axis=1, ddof=1) / np.sqrt(n) if n > 1 else np.full(len(col_names), np.inf)
+            # Sample quantiles at the ranks q can land on: q + z * sqrt(q(1-q)/n), z ~ N(0, 1)
+            rank_probs = np.clip(probs[:, np.newaxis] + RANK_Z * np.sqrt(probs * (1 - probs) / n)[:, np.newaxis], 0, 1)
+            rank_values = np.quantile(stacked, rank_probs.ravel(), axis=1).reshape(len(probs), len(RANK_Z), -1)
+            quantile_se = np.where(np.ptp(rank_values, axis=1) == 0, 0.0, rank_values.std(axis=1)).T  # (n_cols, n_quantiles)
+            if n == 1:
+                quantile_se = np.full_like(quantile_se, np.inf)
+
+            checked = np.column_stack([mean_se, quantile_se[:, interior]])
+            target = rel_tol * np.abs(means)[:, np.newaxis]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(checked == 0, 0.0, checked / target)
+            worst = float(ratio.max())
+            if worst <= 1 or n >= max_simulations:
+                break
+            # SE shrinks like 1 / sqrt(n): estimate the samples still missing
+            n_new = int(min(max(np.ceil(n * min(worst, 1e6) ** 2) - n, 1), n, max_simulations - n))
+
+        def finite_or_none(se):
+            # A single sample has no SE (and JSON has no inf)
+            return float(se) if np.isfinite(se) else None
+
+        results = SimulationResult({col: np.concatenate(values) for col, values in columns.items()})
+        convergence = {
+            "n_simulations": n,
+            "rel_tol": rel_tol,
+            "converged": worst <= 1,
+            "standard_errors": {
+                col: {
+                    "mean": finite_or_none(mean_se[i]),
+                    "quantiles": {q: finite_or_none(quantile_se[i, j]) for j, q in enumerate(quantiles)}
+                }
+                for i, col in enumerate(col_names)
+            }
+        }
+        if worst > 1:
+            convergence["warning"] = (f"Stopped at max_simulations={max_simulations} before every standard error "
+                                      f"reached rel_tol * |mean|.")
+        return self.summarize(results, col_names, quantiles), convergence
 
-    def get_quintiles(self, df, col_name):
+    def get_quintiles(self, results, col_name):
         """Returns quintiles (0, 20, 40, 60, 80, 100) for a given column."""
-        return df[col_name].quantile([0, 0.2, 0.4, 0.6, 0.8, 1.0]).to_dict()
+        values = np.quantile(np.asarray(results[col_name], dtype=float), QUINTILES, axis=-1)
+        return {q: values[j].tolist() for j, q in enumerate(QUINTILES)}
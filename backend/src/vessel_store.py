@@ -0,0 +1,131 @@
+import numpy as np
+import shapely
+
+NM_TO_KM = 1.852
+EUR_TO_USD = 1.08 # approx
+PENALTY_SHARE_PER_HOUR = 0.0001 # Heuristic: late penalty is 0.01% of cargo value per hour
+
+
+class VesselStore:
+    """
+    Columnar, read-only vessel table.
+
+    Numeric attributes are NumPy arrays (one row per vessel). Vessel names and
+    contract ids are dictionary-encoded: `strings` holds each distinct string once
+    and the *_codes arrays index into it. Lookups go through hash indexes
+    (contract id -> row, vessel name -> rows) and an STRtree over vessel positions.
+    """
+
+    def __init__(self, vessel_names, contract_ids, distance_km, cargo_value_usd, late_penalty_usd_per_hour, lons, lats, version="defaults"):
+        self.version = version
+        self.strings = []
+        string_codes = {}
+
+        def encode(values):
+            codes = np.empty(len(values), dtype=np.int32)
+            for i, value in enumerate(values):
+                code = string_codes.get(value)
+                if code is None:
+                    code = string_codes[value] = len(self.strings)
+                    self.strings.append(value)
+                codes[i] = code
+            return codes
+
+        self.name_codes = encode(vessel_names)
+        self.contract_codes = encode(contract_ids)
+        self.distance_km = np.asarray(distance_km, dtype=float)
+        self.cargo_value_usd = np.asarray(cargo_value_usd, dtype=float)
+        self.late_penalty_usd_per_hour = np.asarray(late_penalty_usd_per_hour, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.lats = np.asarray(lats, dtype=float)
+
+        # Hash indexes
+        self._by_contract = {contract_id: i for i, contract_id in enumerate(contract_ids)}
+        self._by_name = {}
+        for i, name in enumerate(vessel_names):
+            self._by_name.setdefault(name, []).append(i)
+
+        # Spatial index over vessels with a position
+        self._positioned = np.flatnonzero(~(np.isnan(self.lons) | np.isnan(self.lats)))
+        self._tree = shapely.STRtree(shapely.points(self.lons[self._positioned], self.lats[self._positioned]))
+
+    @classmethod
+    def from_geojson(cls, data, version="defaults"):
+        """
+        Builds the store from a FeatureCollection (the Lena Case format). Features
+        with a vessel_name are vessels. Contract ids are LENA-1, LENA-2, ... in file
+        order, values are converted EUR -> USD and the late penalty follows from the
+        value.
+        """
+        names, contract_ids, distances, values, lons, lats = [], [], [], [], [], []
+        for feature in data.get("features", []):
+            props = feature.get("properties") or {}
+            # Lena Case file doesn't have "feature_kind", check for vessel attributes
+            if "vessel_name" not in props:
+                continue
+            names.append(props.get("vessel_name"))
+            contract_ids.append(f"LENA-{len(contract_ids) + 1}")
+            distances.append(props.get("dist_hamburg_nm", 0) * NM_TO_KM)
+            values.append(props.get("value_eur", 0) * EUR_TO_USD)
+            coords = (feature.get("geometry") or {}).get("coordinates") or []
+            lons.append(coords[0] if len(coords) >= 2 else np.nan)
+            lats.append(coords[1] if len(coords) >= 2 else np.nan)
+        values = np.asarray(values, dtype=float)
+        return cls(names, contract_ids, distances, values, values * PENALTY_SHARE_PER_HOUR, lons, lats, version)
+
+    @classmethod
+    def empty(cls, version="defaults"):
+        return cls([], [], [], [], [], [], [], version)
+
+    def __len__(self):
+        return len(self.distance_km)
+
+    @property
+    def avg_distance_km(self):
+        return float(self.distance_km.mean()) if len(self) else None
+
+    @property
+    def avg_cargo_value(self):
+        return float(self.cargo_value_usd.mean()) if len(self) else None
+
+    def record(self, i):
+        """Vessel i as a dict (the fields the API used to add to each feature)."""
+        name = self.strings[self.name_codes[i]]
+        return {
+            "contract_id": self.strings[self.contract_codes[i]],
+            "vessel_name": name,
+            "route_name": f"Hamburg Route: {name}",
+            "dist_hamburg_km": float(self.distance_km[i]),
+            "cargo_value_usd": float(self.cargo_value_usd[i]),
+            "late_penalty_usd_per_hour": float(self.late_penalty_usd_per_hour[i]),
+            "client_importance": "High",
+            "position": None if np.isnan(self.lons[i]) else [float(self.lons[i]), float(self.lats[i])]
+        }
+
+    def by_contract_id(self, contract_id):
+        """Row of the vessel with this contract id, or None."""
+        return self._by_contract.get(contract_id)
+
+    def by_vessel_name(self, vessel_name):
+        """Rows of the vessels with this name (names are not unique)."""
+        return list(self._by_name.get(vessel_name, ()))
+
+    def in_bbox(self, min_lon, min_lat, max_lon, max_lat):
+        """Rows of the vessels positioned inside the bbox (edges included), in row order."""
+        hits = self._tree.query(shapely.box(min_lon, min_lat, max_lon, max_lat), predicate="intersects")
+        return np.sort(self._positioned[hits]).tolist()
+
+    def exposure_usd(self, delay_hours, spoilage_rate=0.3):
+        """Per-vessel cost of a delay of delay_hours: late penalty plus spoilage loss."""
+        spoilage = self.cargo_value_usd * (1 - np.power(1 - spoilage_rate, delay_hours / 12.0))
+        return self.late_penalty_usd_per_hour * delay_hours + spoilage
+
+    def top_by_exposure(self, n, delay_hours, spoilage_rate=0.3):
+        """(rows, exposures) of the n most exposed vessels, largest first."""
+        exposure = self.exposure_usd(delay_hours, spoilage_rate)
+        n = min(n, len(exposure))
+        if n <= 0:
+            return [], []
+        top = np.argpartition(-exposure, n - 1)[:n]
+        top = top[np.argsort(-exposure[top], kind="stable")]
+        return top.tolist(), exposure[top].tolist()